@@ -0,0 +1,93 @@
+import json
+import sys
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, Optional, TextIO
+
+FORMATS = ("table", "sarif", "ndjson")
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+BUFFER_BYTES = 64 * 1024
+
+
+class FindingWriter(ABC):
+    """Writes findings one by one as they are produced, through a buffered stream.
+
+    Use as a context manager: the document is completed on exit, also when
+    the scan is interrupted, so partial results stay usable.
+    """
+
+    def __init__(self, stream: TextIO, owned: bool = False):
+        self._stream = stream
+        self._owned = owned
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    @abstractmethod
+    def write(self, rule: str, path: str, line: int, message: str, properties: Optional[Dict] = None) -> None:
+        """Writes one finding and counts it."""
+
+    def close(self) -> None:
+        self._stream.flush()
+        if self._owned:
+            self._stream.close()
+
+
+class NdjsonWriter(FindingWriter):
+    """One JSON object per line; every complete line is a valid finding."""
+
+    def write(self, rule: str, path: str, line: int, message: str, properties: Optional[Dict] = None) -> None:
+        record = {"rule": rule, "path": path, "line": line, "message": message, **(properties or {})}
+        self._stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+
+
+class SarifWriter(FindingWriter):
+    """A SARIF 2.1.0 log with a single run, streamed result by result."""
+
+    def __init__(self, stream: TextIO, tool: str, rules: Iterable[str] = (), owned: bool = False):
+        super().__init__(stream, owned)
+        driver = {"name": tool, "rules": [{"id": r, "name": r} for r in rules]}
+        head = json.dumps({"$schema": SARIF_SCHEMA, "version": "2.1.0", "runs": [{"tool": {"driver": driver}}]})
+        # Everything up to the closing "}]}" of the run, then an open results array.
+        self._stream.write(head[:-3] + ', "results": [\n')
+        self._closed = False
+
+    def write(self, rule: str, path: str, line: int, message: str, properties: Optional[Dict] = None) -> None:
+        result = {
+            "ruleId": rule,
+            "level": "error",
+            "message": {"text": message},
+            "locations": [
+                {"physicalLocation": {"artifactLocation": {"uri": path}, "region": {"startLine": line}}}
+            ],
+        }
+        if properties:
+            result["properties"] = properties
+        self._stream.write(("" if self.count == 0 else ",\n") + json.dumps(result, ensure_ascii=False))
+        self.count += 1
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._stream.write("\n]}]}\n")
+        super().close()
+
+
+def open_writer(fmt: str, output: Optional[Path], tool: str, rules: Iterable[str] = ()) -> FindingWriter:
+    """Writer for `fmt` ("sarif" or "ndjson") to `output`, or stdout when it is None or "-"."""
+    if output is None or str(output) == "-":
+        stream, owned = sys.stdout, False
+    else:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        stream, owned = open(output, "w", encoding="utf-8", buffering=BUFFER_BYTES), True
+    if fmt == "sarif":
+        return SarifWriter(stream, tool, rules, owned=owned)
+    if fmt == "ndjson":
+        return NdjsonWriter(stream, owned=owned)
+    raise ValueError(f"unknown format {fmt!r} (expected one of {', '.join(FORMATS[1:])})")
@@ -1 +1 @@
-__all__ = ["cli", "generator"]
+__all__ = ["builder", "cli", "generator", "index", "pages"]
@@ -0,0 +1,188 @@
+import hashlib
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from . import index
+from .generator import Symbol, analyze
+
+# Bump when `extract` or the index tokens change, so cached pages are regenerated.
+CACHE_VERSION = 5
+# Below this many modules to extract, a process pool costs more than it saves.
+POOL_MIN_MODULES = 16
+
+
+@dataclass
+class ModuleDoc:
+    path: str
+    markdown: str
+    error: Optional[str] = None
+
+
+@dataclass
+class BuildResult:
+    modules: List[ModuleDoc] = field(default_factory=list)
+    extracted: int = 0
+    cached: int = 0
+
+    @property
+    def failures(self) -> List[ModuleDoc]:
+        return [m for m in self.modules if m.error]
+
+
+def iter_sources(root: Path) -> List[Path]:
+    """Python files under `root` in module path order, each package's modules together."""
+    def key(p: Path):
+        rel = p.relative_to(root)
+        return rel.parent.as_posix(), rel.name
+
+    return sorted(root.rglob("*.py"), key=key)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class DocCache:
+    """SQLite cache of extracted Markdown per module, keyed by path and content hash.
+
+    The same file holds the symbol index (see `index`), kept in step with it.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path))
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+            for table in ("modules", "symbols", "tokens"):
+                self._db.execute(f"DROP TABLE IF EXISTS {table}")
+            self._db.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS modules (path TEXT PRIMARY KEY, hash TEXT NOT NULL, markdown TEXT NOT NULL, error TEXT)"
+        )
+        index.create(self._db)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self) -> None:
+        self._db.commit()
+        self._db.close()
+
+    def entries(self) -> Dict[str, Tuple[str, str, Optional[str]]]:
+        return {row[0]: row[1:] for row in self._db.execute("SELECT path, hash, markdown, error FROM modules")}
+
+    def put(self, path: str, digest: str, markdown: str, error: Optional[str], symbols: List[Symbol]) -> None:
+        self._db.execute("INSERT OR REPLACE INTO modules VALUES (?, ?, ?, ?)", (path, digest, markdown, error))
+        index.replace_module(self._db, path, symbols)
+
+    def prune(self, keep) -> int:
+        gone = [(p,) for p in self.entries() if p not in keep]
+        self._db.executemany("DELETE FROM modules WHERE path = ?", gone)
+        for (p,) in gone:
+            index.remove_module(self._db, p)
+        return len(gone)
+
+
+def module_name(path: str) -> str:
+    """Dotted module name of a POSIX path relative to the root (`pkg/__init__.py` is `pkg`)."""
+    name = path[:-3].replace("/", ".")
+    return name[: -len(".__init__")] if name.endswith(".__init__") else name
+
+
+Extracted = Tuple[str, Optional[str], List[Symbol]]
+
+
+def _extract_one(path: str, module: str) -> Extracted:
+    try:
+        markdown, found = analyze(Path(path), module)
+        return markdown, None, found
+    except Exception as e:  # reported per module by the caller
+        return "", f"{type(e).__name__}: {e}", []
+
+
+def _extract_all(paths: List[str], modules: List[str], jobs: int) -> Iterator[Extracted]:
+    """Results in the order of `paths`, yielded as soon as each one is ready."""
+    if jobs <= 1 or len(paths) < POOL_MIN_MODULES:
+        yield from map(_extract_one, paths, modules)
+        return
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(_extract_one, paths, modules, chunksize=chunksize)
+
+
+def iter_build(
+    root: Path, cache_path: Optional[Path] = None, jobs: Optional[int] = None, stats: Optional[BuildResult] = None
+) -> Iterator[ModuleDoc]:
+    """Yields the docs of every module under `root`, in `iter_sources` order.
+
+    Modules whose content hash matches the cache are reused; the rest are
+    extracted in a process pool of `jobs` workers (default: one per CPU).
+    Modules that fail to parse are kept with their error, not dropped.
+    Counters are accumulated in `stats` when given.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    stats = stats if stats is not None else BuildResult()
+    sources = [(p.relative_to(root).as_posix(), p) for p in iter_sources(root)]
+    cache = DocCache(cache_path) if cache_path else None
+    try:
+        known = cache.entries() if cache else {}
+        plan: List[Tuple[str, Optional[str], Optional[ModuleDoc]]] = []
+        for rel, p in sources:
+            try:
+                digest = content_hash(p.read_bytes())
+            except OSError as e:
+                plan.append((rel, None, ModuleDoc(rel, "", f"{type(e).__name__}: {e}")))
+                continue
+            hit = known.get(rel)
+            if hit and hit[0] == digest:
+                plan.append((rel, digest, ModuleDoc(rel, hit[1], hit[2])))
+                stats.cached += 1
+            else:
+                plan.append((rel, digest, None))
+        todo = [rel for rel, _, doc in plan if doc is None]
+        extracted = _extract_all([str(root / rel) for rel in todo], [module_name(rel) for rel in todo], jobs)
+        for rel, digest, doc in plan:
+            if doc is None:
+                markdown, error, found = next(extracted)
+                doc = ModuleDoc(rel, markdown, error)
+                stats.extracted += 1
+                if cache:
+                    cache.put(rel, digest, markdown, error, found)
+            yield doc
+        if cache:
+            cache.prune({rel for rel, _ in sources})
+    finally:
+        if cache:
+            cache.close()
+
+
+def build(root: Path, cache_path: Optional[Path] = None, jobs: Optional[int] = None) -> BuildResult:
+    """All module docs at once (see `iter_build`)."""
+    result = BuildResult()
+    result.modules = list(iter_build(root, cache_path, jobs, result))
+    return result
+
+
+def benchmark(root: Path, repeat: int = 3) -> Dict[str, float]:
+    """Best-of-`repeat` single-process throughput of `analyze` (parse, Markdown
+    with signatures and symbols) over the modules under `root`, in lines per second.
+
+    Nothing is imported, so the cost does not depend on the project's own imports.
+    """
+    sources = [(str(p), module_name(p.relative_to(root).as_posix())) for p in iter_sources(root)]
+    lines = sum(len(Path(p).read_bytes().splitlines()) for p, _ in sources)
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for p, module in sources:
+            _extract_one(p, module)
+        best = min(best, time.perf_counter() - t0)
+    return {"files": len(sources), "lines": lines, "seconds": best, "loc_per_s": lines / best if best else float("inf")}
@@ -1,24 +1,124 @@
+import sqlite3
+import time
 from pathlib import Path
+from typing import Optional
 import typer
 from rich import print
+from rich.table import Table
 from devx.core import logging as log
-from .generator import extract
+from .builder import BuildResult, benchmark, iter_build
+from .index import search as search_index
+from .pages import write_pages
 
 app = typer.Typer()
 
+
+def _default_cache(root: Path) -> Path:
+    return root / ".devx_cache" / "docgen.sqlite"
+
+
 @app.command("run")
 def run(
     path: Path = typer.Argument(".", help="Project root"),
     out: Path = typer.Option(Path("DOCS.md"), help="Output file"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", min=1, help="Worker processes (default: one per CPU)"),
+    cache: Optional[Path] = typer.Option(None, "--cache", help="Cache file (default: <path>/.devx_cache/docgen.sqlite)"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Extract every module again"),
+    out_dir: Optional[Path] = typer.Option(None, "--out-dir", help="Write one page per package plus index.md here instead of --out"),
 ):
-    _ = log.setup()
+    logger = log.setup()
+    path = path.resolve()
+    cache_path = None if no_cache else (cache or _default_cache(path))
+    t0 = time.perf_counter()
+    result = BuildResult()
+    failures = []
+
+    def modules():
+        for m in iter_build(path, cache_path, jobs, result):
+            if m.error:
+                failures.append(m)
+            yield m
+
+    if out_dir:
+        pages = write_pages(modules(), out_dir, path.name)
+        removed = f", {pages.removed} removed" if pages.removed else ""
+        print(f"📄 Docs generated in {out_dir} ({pages.written} pages written, {pages.unchanged} unchanged{removed})")
+    else:
+        chunks = [m.markdown for m in modules() if m.markdown]
+        content = ("\n\n---\n\n".join(chunks)).strip() or "# Documentation\n\nEmpty."
+        out.write_text(content, encoding="utf-8")
+        print(f"📄 Docs generated at {out}")
+    logger.info(
+        f"{result.extracted + result.cached} modules in {time.perf_counter() - t0:.2f}s "
+        f"({result.extracted} extracted, {result.cached} from cache)"
+    )
+
+    if failures:
+        table = Table(title=f"{len(failures)} modules could not be documented")
+        table.add_column("Module")
+        table.add_column("Error")
+        for m in failures:
+            table.add_row(m.path, m.error)
+        print(table)
+
+
+@app.command("search")
+def search(
+    query: str = typer.Argument(..., help="Words to look for in symbol names and docstrings"),
+    path: Path = typer.Option(Path("."), "--path", help="Project root"),
+    cache: Optional[Path] = typer.Option(None, "--cache", help="Index file (default: <path>/.devx_cache/docgen.sqlite)"),
+    limit: int = typer.Option(20, "--limit", min=1, help="Maximum results"),
+    refresh: bool = typer.Option(False, "--refresh", help="Re-index changed modules before searching"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", min=1, help="Worker processes for --refresh"),
+):
+    """Looks up symbols in the index built by `docgen run`, without parsing any source."""
+    logger = log.setup()
     path = path.resolve()
-    chunks = []
-    for p in path.rglob("*.py"):
-        try:
-            chunks.append(extract(p))
-        except Exception:
+    index_path = cache or _default_cache(path)
+    if refresh:
+        stats = BuildResult()
+        for _ in iter_build(path, index_path, jobs, stats):
             pass
-    content = ("\n\n---\n\n".join(chunks)).strip() or "# Documentation\n\nEmpty."
-    out.write_text(content, encoding="utf-8")
-    print(f"📄 Docs generated at {out}")
+        logger.info(f"Index refreshed ({stats.extracted} modules re-extracted)")
+    if not index_path.exists():
+        logger.error(f"No index at {index_path}; run `devx docgen run` or pass --refresh")
+        raise typer.Exit(code=1)
+    t0 = time.perf_counter()
+    try:
+        hits = search_index(index_path, query, limit)
+    except sqlite3.OperationalError as e:
+        # Written by an older version (or not by docgen): tables or columns are missing.
+        logger.error(f"Index at {index_path} is not usable ({e}); run `devx docgen run` or pass --refresh")
+        raise typer.Exit(code=1)
+    logger.info(f"{len(hits)} results in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    if not hits:
+        print(f"No symbols match '{query}'.")
+        return
+    table = Table(title=f"Symbols matching '{query}'")
+    table.add_column("Symbol")
+    table.add_column("Kind")
+    table.add_column("Location")
+    table.add_column("Signature")
+    table.add_column("Summary")
+    for h in hits:
+        signature = (h.signature[:60] + "…") if len(h.signature) > 60 else h.signature
+        table.add_row(h.qualname, h.kind, f"{h.module}:{h.line_start}", signature, h.summary)
+    print(table)
+
+
+@app.command("bench")
+def bench(
+    path: Path = typer.Argument(".", help="Project root"),
+    repeat: int = typer.Option(3, "--repeat", min=1, help="Runs (best is reported)"),
+):
+    """Extraction throughput in lines of code per second, on one core and without cache."""
+    _ = log.setup()
+    results = benchmark(path.resolve(), repeat)
+    table = Table(title="docgen extraction throughput")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    table.add_row("Modules", str(results["files"]))
+    table.add_row("Lines", str(results["lines"]))
+    table.add_row("Best run", f"{results['seconds']:.3f} s")
+    table.add_row("Lines/s", f"{results['loc_per_s']:,.0f}")
+    print(table)
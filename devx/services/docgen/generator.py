@@ -1,27 +1,148 @@
 import ast
+from dataclasses import dataclass
 from pathlib import Path
+from typing import List, Tuple
 
-def extract(pyfile: Path):
-    tree = ast.parse(pyfile.read_text(encoding="utf-8", errors="ignore"))
+
+@dataclass(frozen=True)
+class Symbol:
+    kind: str  # "module", "class", "method" or "function"
+    name: str
+    qualname: str
+    signature: str
+    decorators: Tuple[str, ...]
+    line_start: int
+    line_end: int
+    doc: str
+
+
+def parse(pyfile: Path) -> ast.Module:
+    return ast.parse(pyfile.read_text(encoding="utf-8", errors="ignore"))
+
+
+def render(tree: ast.Module, title: str) -> str:
     out = []
     mod_doc = ast.get_docstring(tree)
     if mod_doc:
-        out.append(f"# {pyfile.name}\n\n{mod_doc}\n")
+        out.append(f"# {title}\n\n{mod_doc}\n")
 
     for node in tree.body:
         if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            name = node.name
-            doc = ast.get_docstring(node) or "No docs."
-            out.append(f"### {name}\n\n{doc}\n")
-
+            out.append(_section(node, 3))
         elif isinstance(node, ast.ClassDef):
-            class_doc = ast.get_docstring(node) or "No docs."
-            out.append(f"## {node.name}\n\n{class_doc}\n")
-
-            for item in node.body:
-                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                    meth_name = item.name
-                    meth_doc = ast.get_docstring(item) or "No docs."
-                    out.append(f"#### {meth_name}\n\n{meth_doc}\n")
+            out.extend(_class_sections(node, 2))
 
     return "\n".join(out)
+
+
+def _class_sections(node: ast.ClassDef, level: int, prefix: str = "") -> List[str]:
+    """Sections of a class and its members. Nested classes and their members
+    get qualified headings (`Outer.Inner`, `Outer.Inner.method`), so they are
+    not mistaken for members of the outer class at the same depth.
+    """
+    qualname = prefix + node.name
+    members = qualname + "." if prefix else ""
+    out = [_section(node, level, prefix)]
+    for item in node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            out.append(_section(item, level + 2, members))
+        elif isinstance(item, ast.ClassDef):
+            out.extend(_class_sections(item, level + 2, qualname + "."))
+    return out
+
+
+def _is_property(node) -> bool:
+    for d in node.decorator_list:
+        name = ast.unparse(d)
+        if name in ("property", "cached_property", "functools.cached_property") or name.endswith(
+            (".setter", ".getter", ".deleter")
+        ):
+            return True
+    return False
+
+
+def _section(node, level: int, prefix: str = "") -> str:
+    """Heading (the name, after `prefix`), signature block (decorators included)
+    and docstring of a def or class."""
+    suffix = " (property)" if not isinstance(node, ast.ClassDef) and _is_property(node) else ""
+    code = "\n".join(["@" + ast.unparse(d) for d in node.decorator_list] + [_signature(node)])
+    doc = ast.get_docstring(node) or "No docs."
+    return f"{'#' * min(level, 6)} {prefix}{node.name}{suffix}\n\n```python\n{code}\n```\n\n{doc}\n"
+
+
+def extract(pyfile: Path):
+    return render(parse(pyfile), pyfile.name)
+
+
+def _arg(arg: ast.arg, default=None) -> str:
+    text = arg.arg
+    if arg.annotation is not None:
+        text += f": {ast.unparse(arg.annotation)}"
+    if default is not None:
+        text += (" = " if arg.annotation is not None else "=") + ast.unparse(default)
+    return text
+
+
+def _arguments(args: ast.arguments) -> str:
+    """Parameters in PEP 8 spacing: `x=1`, but `x: int = 1`."""
+    positional = args.posonlyargs + args.args
+    defaults = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+    parts = [_arg(a, d) for a, d in zip(positional, defaults)]
+    if args.posonlyargs:
+        parts.insert(len(args.posonlyargs), "/")
+    if args.vararg:
+        parts.append("*" + _arg(args.vararg))
+    elif args.kwonlyargs:
+        parts.append("*")
+    parts += [_arg(a, d) for a, d in zip(args.kwonlyargs, args.kw_defaults)]
+    if args.kwarg:
+        parts.append("**" + _arg(args.kwarg))
+    return ", ".join(parts)
+
+
+def _signature(node) -> str:
+    """The `def`/`class` line of a node, rendered from the AST alone (nothing is imported)."""
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(b) for b in node.bases] + [ast.unparse(k) for k in node.keywords]
+        return f"class {node.name}" + (f"({', '.join(bases)})" if bases else "")
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({_arguments(node.args)}){returns}"
+
+
+def symbols(tree: ast.Module, module: str) -> List[Symbol]:
+    """Module, classes (nested too), methods and top-level functions, with
+    their signature, decorators and line range, straight from the AST."""
+    name = module.rsplit(".", 1)[-1]
+    end = max((getattr(n, "end_lineno", 1) or 1 for n in tree.body), default=1)
+    found = [Symbol("module", name, module, "", (), 1, end, ast.get_docstring(tree) or "")]
+
+    def visit(body, prefix: str, in_class: bool):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                is_class = isinstance(node, ast.ClassDef)
+                kind = "class" if is_class else ("method" if in_class else "function")
+                qualname = f"{prefix}.{node.name}"
+                found.append(
+                    Symbol(
+                        kind,
+                        node.name,
+                        qualname,
+                        _signature(node),
+                        tuple("@" + ast.unparse(d) for d in node.decorator_list),
+                        min([node.lineno] + [d.lineno for d in node.decorator_list]),
+                        node.end_lineno or node.lineno,
+                        ast.get_docstring(node) or "",
+                    )
+                )
+                if is_class:
+                    visit(node.body, qualname, True)
+
+    visit(tree.body, module, False)
+    return found
+
+
+def analyze(pyfile: Path, module: str) -> Tuple[str, List[Symbol]]:
+    """Markdown (as `extract`) and symbols of a file, from a single parse."""
+    tree = parse(pyfile)
+    return render(tree, pyfile.name), symbols(tree, module)
@@ -0,0 +1,139 @@
+import re
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .generator import Symbol
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS symbols (id INTEGER PRIMARY KEY, module TEXT NOT NULL, kind TEXT NOT NULL, "
+    "name TEXT NOT NULL, qualname TEXT NOT NULL, signature TEXT NOT NULL, decorators TEXT NOT NULL, "
+    "line_start INTEGER NOT NULL, line_end INTEGER NOT NULL, doc TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS symbols_module ON symbols (module)",
+    # Inverted index: one row per (token, symbol); in_name ranks name hits above docstring hits.
+    "CREATE TABLE IF NOT EXISTS tokens (token TEXT NOT NULL, symbol INTEGER NOT NULL, in_name INTEGER NOT NULL, "
+    "PRIMARY KEY (token, symbol)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS tokens_symbol ON tokens (symbol)",
+)
+_WORDS = re.compile(r"[^\W\d]\w*|\d+")
+STOPWORDS = frozenset("a an and are as at be by for from if in is it of on or the this to with".split())
+
+
+@dataclass(frozen=True)
+class Hit:
+    module: str
+    kind: str
+    qualname: str
+    signature: str
+    line_start: int
+    line_end: int
+    summary: str
+
+
+def _camel(chunk: str) -> List[str]:
+    """CamelCase parts of a word without underscores: `HTTPServer` is HTTP, Server.
+
+    Case is read with `str.isupper`/`islower`, so non-ASCII letters split too.
+    """
+    parts, start = [], 0
+    for i in range(1, len(chunk)):
+        if chunk[i].isupper() and (not chunk[i - 1].isupper() or chunk[i + 1 : i + 2].islower()):
+            parts.append(chunk[start:i])
+            start = i
+    if chunk:
+        parts.append(chunk[start:])
+    return parts
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased words of `text`, also split on snake_case and CamelCase."""
+    out = []
+    for word in _WORDS.findall(text):
+        out.append(word.lower())
+        parts = [p for chunk in word.split("_") for p in _camel(chunk)]
+        if len(parts) > 1:
+            out.extend(p.lower() for p in parts)
+    return out
+
+
+def _symbol_tokens(symbol: Symbol) -> Dict[str, int]:
+    tokens = {t: 0 for t in tokenize(symbol.doc) if len(t) > 1 and t not in STOPWORDS}
+    tokens.update({t: 1 for t in tokenize(symbol.name)})
+    tokens[symbol.name.lower()] = 1
+    return tokens
+
+
+def create(db: sqlite3.Connection) -> None:
+    for statement in SCHEMA:
+        db.execute(statement)
+
+
+def replace_module(db: sqlite3.Connection, module_path: str, symbols: Iterable[Symbol]) -> None:
+    """Replaces the indexed symbols (and their tokens) of one module."""
+    remove_module(db, module_path)
+    for s in symbols:
+        cur = db.execute(
+            "INSERT INTO symbols (module, kind, name, qualname, signature, decorators, line_start, line_end, doc) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (module_path, s.kind, s.name, s.qualname, s.signature, "\n".join(s.decorators), s.line_start, s.line_end, s.doc),
+        )
+        db.executemany(
+            "INSERT INTO tokens VALUES (?, ?, ?)", [(t, cur.lastrowid, n) for t, n in _symbol_tokens(s).items()]
+        )
+
+
+def remove_module(db: sqlite3.Connection, module_path: str) -> None:
+    db.execute("DELETE FROM tokens WHERE symbol IN (SELECT id FROM symbols WHERE module = ?)", (module_path,))
+    db.execute("DELETE FROM symbols WHERE module = ?", (module_path,))
+
+
+def _matches(db: sqlite3.Connection, token: str) -> Dict[int, int]:
+    """`{symbol: in_name}` for indexed tokens starting with `token` (an index range scan)."""
+    rows = db.execute(
+        "SELECT symbol, MAX(in_name) FROM tokens WHERE token >= ? AND token < ? GROUP BY symbol",
+        (token, token + "\uffff"),
+    )
+    return dict(rows)
+
+
+def search(index_path: Path, query: str, limit: int = 20) -> List[Hit]:
+    """Symbols matching every word of `query` (as a prefix), best first.
+
+    Only the prebuilt index is read; no source file is parsed. Exact name
+    matches come first, then matches on names, then on docstrings.
+    """
+    words = [w for w in dict.fromkeys(tokenize(query)) if w not in STOPWORDS] or tokenize(query)
+    if not words:
+        return []
+    db = sqlite3.connect(f"{index_path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        scores: Dict[int, int] = {}
+        ids: Set[int] = set()
+        for i, word in enumerate(words):
+            found = _matches(db, word)
+            ids = set(found) if i == 0 else ids & found.keys()
+            for symbol in ids:
+                scores[symbol] = scores.get(symbol, 0) + found[symbol]
+            if not ids:
+                return []
+        wanted = query.strip().lower()
+        rows: List[Tuple] = []
+        for chunk in _chunks(sorted(ids), 500):
+            rows += db.execute(
+                f"SELECT id, module, kind, name, qualname, signature, line_start, line_end, doc FROM symbols "
+                f"WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+    finally:
+        db.close()
+    rows.sort(key=lambda r: (r[3].lower() != wanted, -scores[r[0]], r[4]))
+    return [
+        Hit(module, kind, qualname, signature, start, end, doc.strip().split("\n", 1)[0])
+        for _, module, kind, _, qualname, signature, start, end, doc in rows[:limit]
+    ]
+
+
+def _chunks(items: List[int], size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
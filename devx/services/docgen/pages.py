@@ -0,0 +1,77 @@
+import glob
+import posixpath
+from dataclasses import dataclass, field
+from itertools import groupby
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+from .builder import ModuleDoc
+
+INDEX_PAGE = "index.md"
+SEPARATOR = "\n\n---\n\n"
+
+
+@dataclass
+class PageStats:
+    pages: List[Tuple[str, str, int]] = field(default_factory=list)
+    written: int = 0
+    unchanged: int = 0
+    removed: int = 0
+
+
+def package_of(module_path: str, root_name: str) -> str:
+    """Dotted package of a module path relative to the root, prefixed with `root_name`."""
+    parent = posixpath.dirname(module_path)
+    return f"{root_name}.{parent.replace('/', '.')}" if parent else root_name
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """Writes `content` unless the file already holds exactly that; True if written.
+
+    Unchanged files are not touched, so their mtime stays the same.
+    """
+    data = content.encode("utf-8")
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return True
+
+
+def write_pages(modules: Iterable[ModuleDoc], out_dir: Path, root_name: str) -> PageStats:
+    """One Markdown page per package, written as soon as its modules are done, plus an index.
+
+    `modules` must keep each package's modules together (as `iter_build` does).
+    Pages of packages that no longer exist are deleted; only files named like
+    the ones written here (`<root_name>.md`, `<root_name>.*.md`) are touched.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stats = PageStats()
+    for package, docs in groupby(modules, key=lambda m: package_of(m.path, root_name)):
+        docs = list(docs)
+        chunks = [m.markdown.strip() for m in docs if m.markdown.strip()] or ["No docs."]
+        name = f"{package}.md"
+        content = f"# Package `{package}`\n\n" + SEPARATOR.join(chunks) + "\n"
+        if write_if_changed(out_dir / name, content):
+            stats.written += 1
+        else:
+            stats.unchanged += 1
+        stats.pages.append((package, name, len(docs)))
+
+    current = {name for _, name, _ in stats.pages}
+    for page in [out_dir / f"{root_name}.md", *out_dir.glob(f"{glob.escape(root_name)}.*.md")]:
+        if page.name not in current and page.is_file():
+            page.unlink()
+            stats.removed += 1
+
+    lines = ["# Documentation", ""]
+    lines += [f"- [{package}]({name}) — {n} module{'s' if n != 1 else ''}" for package, name, n in stats.pages]
+    if write_if_changed(out_dir / INDEX_PAGE, "\n".join(lines) + "\n"):
+        stats.written += 1
+    else:
+        stats.unchanged += 1
+    return stats
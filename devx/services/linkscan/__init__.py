@@ -1 +1 @@
-__all__ = ["cli", "crawler"]
+__all__ = ["cli", "crawler", "links", "ratecontrol", "robots", "simhash", "sitemaps", "state", "targets", "urls"]
@@ -1,19 +1,135 @@
+import asyncio
+import enum
+from pathlib import Path
+from typing import Optional
 import typer
 from rich.table import Table
 from rich import print
 from devx.core import logging as log
-from .crawler import crawl
+from .crawler import crawl, crawl_async
+from .ratecontrol import HostLimiter
+from .simhash import NearDuplicates
+from .state import CrawlState
+from .targets import TargetChecker
+from .urls import make_visited
 
 app = typer.Typer()
 
+class ParserKind(str, enum.Enum):
+    html = "html"
+    lxml = "lxml"
+
+class VisitedKind(str, enum.Enum):
+    fingerprint = "fingerprint"
+    bloom = "bloom"
+
 @app.command("run")
 def run(
     url: str = typer.Argument(...),
     limit: int = typer.Option(100),
     timeout: float = typer.Option(10.0),
+    concurrency: int = typer.Option(10, "--concurrency", min=1, help="Global concurrent requests"),
+    per_host: int = typer.Option(4, "--per-host", min=1, help="Concurrent requests per host (initial value if adaptive)"),
+    adaptive: bool = typer.Option(True, "--adaptive/--no-adaptive", help="AIMD per-host concurrency"),
+    robots: bool = typer.Option(True, "--robots/--no-robots", help="Read robots.txt and honour its Crawl-delay"),
+    max_per_host: int = typer.Option(32, "--max-per-host", min=1, help="Upper bound for adaptive per-host concurrency"),
+    parser: ParserKind = typer.Option(ParserKind.html, "--parser", help="Link extractor: html (stdlib tokenizer) or lxml"),
+    sequential: bool = typer.Option(False, "--sequential", help="Use the one-page-at-a-time crawler"),
+    visited_kind: VisitedKind = typer.Option(VisitedKind.fingerprint, "--visited", help="Visited set: fingerprint (exact, 8 bytes/URL) or bloom (fixed memory)"),
+    bloom_capacity: int = typer.Option(1_000_000, "--bloom-capacity", min=1, help="Expected URLs for --visited bloom"),
+    bloom_error: float = typer.Option(0.001, "--bloom-error", min=1e-9, max=0.5, help="False-positive rate for --visited bloom"),
+    state_path: Optional[Path] = typer.Option(None, "--state", help="SQLite file to resume interrupted crawls and revalidate pages with conditional requests"),
+    sitemaps: bool = typer.Option(False, "--sitemaps", help="Seed the crawl with URLs from robots.txt sitemaps or /sitemap.xml"),
+    assets: bool = typer.Option(False, "--assets", help="Also check <img>, <script>, stylesheet/icon <link>... URLs"),
+    external: bool = typer.Option(False, "--external", help="Also check links to other hosts"),
+    near_dups: bool = typer.Option(False, "--near-dups", help="Cluster near-duplicate pages (SimHash) and report soft-404s"),
+    prune_after: int = typer.Option(0, "--prune-after", min=0, help="Stop following links of a URL pattern after N near-duplicates (0 = never)"),
+    simhash_distance: int = typer.Option(3, "--simhash-distance", min=0, max=15, help="Max differing SimHash bits for near-duplicates"),
 ):
-    _ = log.setup()
-    broken = crawl(url, limit=limit, timeout=timeout)
+    logger = log.setup()
+    limiter = checker = dedup = None
+    visited = make_visited(visited_kind.value, bloom_capacity, bloom_error)
+    if sequential:
+        for flag, value in (
+            ("--state", state_path),
+            ("--sitemaps", sitemaps),
+            ("--assets", assets),
+            ("--external", external),
+            ("--near-dups", near_dups or prune_after),
+        ):
+            if value:
+                raise typer.BadParameter("not supported with --sequential", param_hint=flag)
+        broken = crawl(url, limit=limit, timeout=timeout, visited=visited, parser=parser.value)
+    else:
+        limiter = HostLimiter(per_host, adaptive=adaptive, max_per_host=max_per_host)
+        state = CrawlState(state_path) if state_path else None
+        if near_dups or prune_after:
+            dedup = NearDuplicates(simhash_distance, prune_after)
+        if assets or external:
+            checker = TargetChecker(assets=assets, external=external, concurrency=concurrency)
+        try:
+            broken = asyncio.run(
+                crawl_async(
+                    url,
+                    limit=limit,
+                    timeout=timeout,
+                    concurrency=concurrency,
+                    per_host=per_host,
+                    limiter=limiter,
+                    parser=parser.value,
+                    visited=visited,
+                    state=state,
+                    sitemaps=sitemaps,
+                    checker=checker,
+                    dedup=dedup,
+                    robots=robots,
+                )
+            )
+        finally:
+            if state is not None:
+                state.close()
+        if state is not None:
+            if state.resumed:
+                logger.info(f"Resumed unfinished crawl from {state_path}")
+            logger.info(f"Unchanged pages (304): {state.unchanged}")
+    if limiter and limiter.gates:
+        rates = Table(title="Crawl rate per host")
+        rates.add_column("Host")
+        for col in ("Requests", "Rate (req/s)", "Mean limit", "Final limit", "Backoffs", "Crawl-delay (s)"):
+            rates.add_column(col, justify="right")
+        for host, gate in limiter.gates.items():
+            rates.add_row(
+                host,
+                str(gate.requests),
+                f"{gate.rate:.1f}",
+                f"{gate.mean_limit:.1f}",
+                f"{gate.limit:.1f}",
+                str(gate.backoffs),
+                f"{gate.crawl_delay:g}",
+            )
+        print(rates)
+    if dedup is not None and dedup.clusters:
+        clusters = Table(title="Near-duplicate pages")
+        clusters.add_column("First seen")
+        clusters.add_column("Duplicates", justify="right")
+        clusters.add_column("Examples")
+        for first, members in dedup.clusters.items():
+            clusters.add_row(first, str(len(members) - 1), "\n".join(members[1:4]))
+        print(clusters)
+        for pattern, skipped in dedup.pruned.items():
+            logger.info(f"Stopped following links from {pattern} ({skipped} more pages)")
+    if checker is not None:
+        logger.info(f"Checked {checker.requests} unique assets/external links")
+        failed = checker.broken()
+        if failed:
+            targets = Table(title="Broken assets / external links")
+            targets.add_column("URL")
+            targets.add_column("Status", justify="right")
+            targets.add_column("Referrers")
+            for u, s, refs in failed:
+                more = f" (+{len(refs) - 3} more)" if len(refs) > 3 else ""
+                targets.add_row(u, str(s), "\n".join(refs[:3]) + more)
+            print(targets)
     if not broken:
         print("✅ No broken links.")
         return
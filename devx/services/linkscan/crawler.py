@@ -1,33 +1,281 @@
+import asyncio
+import secrets
+import time
 from urllib.parse import urljoin, urlparse
 import httpx
-from bs4 import BeautifulSoup
+from httpx import TimeoutException
 from collections import deque
+from .links import NON_HTML_PATH, is_html, make_parser, parse_links
+from .ratecontrol import BACKOFF_STATUS, HostLimiter, parse_retry_after
+from .robots import fetch_robots
+from .sitemaps import sitemap_urls
+from .state import Page
+from .targets import probe, probe_sync
+from .urls import make_visited, strip_fragment
 
 def same_host(a: str, b: str) -> bool:
     return urlparse(a).netloc == urlparse(b).netloc
 
-def crawl(url: str, limit=100, timeout=10.0):
-    seen, queue, broken = set(), deque([url]), []
+def resolve_links(root: str, current: str, hrefs):
+    for href in hrefs:
+        link = strip_fragment(urljoin(current, href))
+        if same_host(root, link) and link.startswith(("http://", "https://")):
+            yield link
+
+def split_targets(root: str, current: str, hrefs, assets):
+    """`(external, assets)`: absolute http(s) links to other hosts and asset URLs."""
+    resolved = ([], [])
+    for kind, urls in enumerate((hrefs, assets)):
+        for href in urls:
+            link = strip_fragment(urljoin(current, href))
+            if link.startswith(("http://", "https://")) and (kind or not same_host(root, link)):
+                resolved[kind].append(link)
+    return resolved
+
+def extract_links(root: str, current: str, html: str):
+    return resolve_links(root, current, parse_links(html))
+
+def crawl(url: str, limit=100, timeout=10.0, visited=None, parser="html"):
+    """One page at a time. Bodies are streamed and capped like in
+    `crawl_async`, and only HTML responses are read at all."""
+    visited = visited if visited is not None else make_visited()
+    url = strip_fragment(url)
+    visited.add(url)
+    queue, broken, fetched = deque([url]), [], 0
     with httpx.Client(timeout=timeout, follow_redirects=True) as client:
-        while queue and len(seen) < limit:
+        while queue and fetched < limit:
             current = queue.popleft()
-            if current in seen:
-                continue
-            seen.add(current)
+            fetched += 1
             try:
-                r = client.get(current)
-                if r.status_code >= 400:
-                    broken.append((current, r.status_code))
-                    continue
-                soup = BeautifulSoup(r.text, "html.parser")
-                for a in soup.select("a[href]"):
-                    link = urljoin(current, a["href"])
-                    if (
-                        same_host(url, link)
-                        and link.startswith(("http://", "https://"))
-                        and link not in seen
-                    ):
-                        queue.append(link)
+                r = _open_sync(client, current)
+                try:
+                    if r.status_code >= 400:
+                        broken.append((current, r.status_code))
+                        continue
+                    if not is_html(r.headers.get("content-type", "")):
+                        continue
+                    for link in resolve_links(url, current, _read_links_sync(r, parser).links):
+                        if visited.add(link):
+                            queue.append(link)
+                finally:
+                    r.close()
             except Exception:
                 broken.append((current, "ERR"))
     return broken
+
+MAX_HTML_CHARS = 10_000_000
+
+def _open_sync(client, url):
+    """Blocking counterpart of `_open`."""
+    if NON_HTML_PATH.search(urlparse(url).path):
+        return probe_sync(client, url)
+    return client.send(client.build_request("GET", url), stream=True)
+
+def _read_links_sync(r, parser_kind):
+    """Blocking counterpart of `_read_links`."""
+    parser = make_parser(parser_kind)
+    read = 0
+    for chunk in r.iter_text():
+        parser.feed(chunk)
+        read += len(chunk)
+        if read >= MAX_HTML_CHARS:
+            break
+    parser.close()
+    return parser
+
+async def _open(client, url, headers=None):
+    """Response with headers only; the body (if any) is left unread.
+
+    Paths that are obviously not HTML only get a HEAD (or a 1-byte ranged
+    GET when the server rejects HEAD).
+    """
+    if NON_HTML_PATH.search(urlparse(url).path):
+        return await probe(client, url)
+    request = client.build_request("GET", url, headers=headers or {})
+    return await client.send(request, stream=True)
+
+async def _read_links(r, parser_kind, text=False):
+    parser = make_parser(parser_kind, text)
+    read = 0
+    async for chunk in r.aiter_text():
+        parser.feed(chunk)
+        read += len(chunk)
+        if read >= MAX_HTML_CHARS:
+            break
+    parser.close()
+    return parser
+
+async def _fetch(client, root, url, limiter, parser_kind="html", cached=None, text=False):
+    """Fetches one page through its host gate and returns a `Page`.
+
+    With a `cached` page the request is conditional; on a 304 its stored
+    links and targets are returned without reading a body. `text=True`
+    also computes the SimHash of the page text.
+    """
+    gate = limiter(url)
+    headers = cached.conditional_headers() if cached is not None else None
+    for attempt in range(limiter.retries + 1):
+        await gate.acquire()
+        t0 = time.perf_counter()
+        status, latency, timed_out, retry_after, parsed = "ERR", None, False, None, None
+        etag = last_modified = None
+        try:
+            r = await _open(client, url, headers)
+            status, latency = r.status_code, time.perf_counter() - t0
+            etag, last_modified = r.headers.get("etag"), r.headers.get("last-modified")
+            try:
+                if status in BACKOFF_STATUS:
+                    retry_after = parse_retry_after(r.headers.get("Retry-After"))
+                elif status < 400 and is_html(r.headers.get("content-type", "")):
+                    parsed = await _read_links(r, parser_kind, text)
+            finally:
+                await r.aclose()
+        except Exception as e:
+            status, timed_out = "ERR", isinstance(e, TimeoutException)
+        finally:
+            await gate.release(status, latency, timed_out=timed_out, retry_after=retry_after)
+        if status not in BACKOFF_STATUS:
+            break
+    page = Page(status, etag=etag, last_modified=last_modified)
+    if not page.ok:
+        page.etag = page.last_modified = None
+    elif status == 304 and cached is not None:
+        page.links, page.targets, page.simhash = list(cached.links), cached.targets, cached.simhash
+    elif parsed is not None:
+        page.links = list(resolve_links(root, url, parsed.links))
+        page.targets = split_targets(root, url, parsed.links, parsed.assets)
+        if parsed.simhash is not None:
+            page.simhash = parsed.simhash.digest()
+    return page
+
+async def _soft404_template(client, root, limiter, parser_kind):
+    """SimHash of the page served for a URL that cannot exist, if it is a 200."""
+    probe_url = urljoin(root, f"/devx-{secrets.token_hex(8)}-not-found")
+    page = await _fetch(client, root, probe_url, limiter, parser_kind, text=True)
+    return page.simhash if page.ok else None
+
+async def crawl_async(
+    url: str,
+    limit=100,
+    timeout=10.0,
+    concurrency=10,
+    per_host=4,
+    limiter=None,
+    parser="html",
+    visited=None,
+    state=None,
+    sitemaps=False,
+    checker=None,
+    dedup=None,
+    robots=True,
+):
+    """Concurrent crawl with the same result (and order) as `crawl`.
+
+    Pages are fetched level by level with a worker pool; each level is
+    capped to the remaining `limit` in BFS order and its links are merged
+    in page order, so the visited set matches the sequential BFS. URLs are
+    deduplicated on their canonical form when they are enqueued.
+
+    With a `state` (`CrawlState`) every page and level is persisted as it
+    completes: an unfinished run for the same URL resumes where it stopped,
+    and pages from earlier runs are revalidated with conditional requests.
+
+    With `robots=True` the site's robots.txt is read once and its
+    `Crawl-delay` is applied to the host gate, adaptive or not.
+
+    `sitemaps=True` seeds the first level with the same-host URLs listed in
+    the sitemaps from robots.txt (or `/sitemap.xml`), so they are fetched in
+    parallel right away instead of being discovered level by level.
+
+    With a `checker` (`TargetChecker`) the assets and external links of
+    every page are checked too; results are kept on the checker.
+
+    With `dedup` (`NearDuplicates`) the SimHash of every page is clustered;
+    pages matching the site's not-found template are reported as
+    `soft-404`, and links are no longer followed from URL patterns it has
+    pruned.
+    """
+    visited = visited if visited is not None else make_visited()
+    url = strip_fragment(url)
+    level, broken, fetched, depth, done = [url], [], 0, 0, {}
+    resumed = state is not None and state.start(url)
+    if resumed:
+        history, done = state.levels(), state.results()
+        for urls in history:
+            for link in urls:
+                visited.add(link)
+        if history:
+            level, depth = history[-1], len(history) - 1
+    visited.add(url)
+    limiter = limiter or HostLimiter(per_host)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True, limits=limits) as client:
+        if robots or sitemaps:
+            rules = await fetch_robots(client, url)
+            if robots and rules.crawl_delay:
+                limiter(url).crawl_delay = rules.crawl_delay
+            if sitemaps and not resumed:
+                seeds = await sitemap_urls(client, url, rules.sitemaps, limit)
+                level.extend(
+                    link
+                    for link in map(strip_fragment, seeds)
+                    if same_host(url, link) and visited.add(link)
+                )
+        if resumed and checker is not None:
+            for current in done:
+                checker.submit(client, limiter, current, *state.targets(current))
+        if dedup is not None:
+            dedup.template = await _soft404_template(client, url, limiter, parser)
+        if resumed:
+            for urls in history[:-1]:
+                fetched += len(urls)
+                _merge(urls, [done[current] for current in urls], broken, visited, dedup)
+        while level and fetched < limit:
+            batch = level[: limit - fetched]
+            fetched += len(batch)
+            if state is not None:
+                state.push_level(depth, batch)
+
+            results = [done.get(current) for current in batch]
+            queue = asyncio.Queue()
+            for i, current in enumerate(batch):
+                if results[i] is None:
+                    queue.put_nowait((i, current))
+
+            async def worker():
+                while not queue.empty():
+                    i, current = queue.get_nowait()
+                    cached = state.page(current) if state is not None else None
+                    page = await _fetch(
+                        client, url, current, limiter, parser, cached, text=dedup is not None
+                    )
+                    if state is not None:
+                        page = state.record(current, page)
+                    if checker is not None:
+                        checker.submit(client, limiter, current, *page.targets)
+                    results[i] = page
+
+            await asyncio.gather(*(worker() for _ in range(min(concurrency, queue.qsize()))))
+
+            level, depth = _merge(batch, results, broken, visited, dedup), depth + 1
+        if checker is not None:
+            await checker.drain()
+    if state is not None:
+        state.finish()
+    return broken
+
+def _merge(batch, pages, broken, visited, dedup=None):
+    """Records the broken pages of a level and returns the next one, in page order."""
+    level = []
+    for current, page in zip(batch, pages):
+        if not page.ok:
+            broken.append((current, page.status))
+            continue
+        if dedup is not None and page.simhash is not None:
+            if dedup.is_soft404(page.simhash):
+                broken.append((current, "soft-404"))
+                continue
+            if not dedup.observe(current, page.simhash):
+                continue
+        level.extend(link for link in page.links if visited.add(link))
+    return level
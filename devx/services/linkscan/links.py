@@ -0,0 +1,140 @@
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+from .simhash import SimHash
+
+NON_HTML_PATH = re.compile(
+    r"\.(pdf|jpe?g|png|gif|svg|webp|avif|ico|bmp|tiff?|zip|gz|tgz|bz2|xz|tar|rar|7z|"
+    r"mp3|mp4|m4a|ogg|wav|webm|avi|mov|mkv|woff2?|ttf|otf|eot|css|js|json|xml|csv|"
+    r"exe|msi|dmg|iso|apk|deb|rpm|docx?|xlsx?|pptx?)$",
+    re.I,
+)
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+TEXTLESS_TAGS = {"script", "style", "noscript", "template"}
+ASSET_ATTRS = {"img": "src", "script": "src", "link": "href", "source": "src", "iframe": "src"}
+# `<link>` is only an asset for these rels; canonical, alternate, next... are not fetched by browsers.
+ASSET_LINK_RELS = frozenset({"stylesheet", "icon", "preload", "modulepreload", "manifest"})
+
+
+def is_html(content_type: str) -> bool:
+    # Sin Content-Type asumimos HTML, como haría un navegador al rastrear.
+    return not content_type or content_type.split(";", 1)[0].strip().lower() in HTML_TYPES
+
+
+def asset_url(tag: str, get) -> Optional[str]:
+    """Asset URL of an element, given its tag and attribute getter, or None."""
+    attr = ASSET_ATTRS.get(tag)
+    if attr is None:
+        return None
+    if tag == "link" and ASSET_LINK_RELS.isdisjoint((get("rel") or "").lower().split()):
+        return None
+    return get(attr) or None
+
+
+class LinkParser(HTMLParser):
+    """Incremental tokenizer that only keeps `<a href>` values (and asset
+    URLs from `<img>`, `<script>`, stylesheet `<link>`...); no tree is
+    built. With `text=True` the visible text feeds a `SimHash`.
+    """
+
+    def __init__(self, text: bool = False):
+        super().__init__(convert_charrefs=True)
+        self.links: List[str] = []
+        self.assets: List[str] = []
+        self.simhash = SimHash() if text else None
+        self._hidden = 0
+
+    def handle_data(self, data):
+        if self.simhash is not None and not self._hidden:
+            self.simhash.update(data)
+
+    def handle_endtag(self, tag):
+        if tag in TEXTLESS_TAGS and self._hidden:
+            self._hidden -= 1
+
+    def handle_starttag(self, tag, attrs):
+        if tag in TEXTLESS_TAGS:
+            self._hidden += 1
+        if tag == "a":
+            href = dict(attrs).get("href", False)
+            if href is not False:
+                self.links.append(href or "")
+        else:
+            src = asset_url(tag, dict(attrs).get)
+            if src:
+                self.assets.append(src)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self.handle_endtag(tag)
+
+
+class LxmlLinkParser:
+    """Same interface as `LinkParser`, backed by lxml's pull parser (optional).
+
+    Finished elements are cleared and dropped, so memory stays flat on long pages.
+    """
+
+    def __init__(self, text: bool = False):
+        from lxml import etree
+
+        self._parser = etree.HTMLPullParser(events=("start", "end"))
+        self.links: List[str] = []
+        self.assets: List[str] = []
+        self.simhash = SimHash() if text else None
+
+    def feed(self, data: str) -> None:
+        self._parser.feed(data)
+        self._drain()
+
+    def close(self) -> None:
+        try:
+            self._parser.close()
+        except Exception:
+            pass
+        self._drain()
+
+    def _text(self, text) -> None:
+        if self.simhash is not None and text:
+            self.simhash.update(text)
+
+    def _drain(self) -> None:
+        for event, el in self._parser.read_events():
+            if event == "end":
+                if el.tag not in TEXTLESS_TAGS:
+                    self._text(el.text)
+                for child in el:
+                    self._text(child.tail)
+                # The tail is text of the parent, read when the parent ends.
+                el.clear(keep_tail=True)
+                parent = el.getparent()
+                while parent is not None and el.getprevious() is not None:
+                    self._text(parent[0].tail)
+                    del parent[0]
+                continue
+            if el.tag == "a":
+                href = el.get("href")
+                if href is not None:
+                    self.links.append(href)
+            else:
+                src = asset_url(el.tag, el.get)
+                if src:
+                    self.assets.append(src)
+
+
+def make_parser(kind: str = "html", text: bool = False):
+    if kind not in ("html", "lxml"):
+        raise ValueError(f"unknown link parser: {kind!r}")
+    if kind == "lxml":
+        try:
+            return LxmlLinkParser(text)
+        except ImportError:
+            pass
+    return LinkParser(text)
+
+
+def parse_links(html: str, kind: str = "html") -> List[str]:
+    parser = make_parser(kind)
+    parser.feed(html)
+    parser.close()
+    return parser.links
@@ -0,0 +1,147 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+BACKOFF_STATUS = {429, 503}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostGate:
+    """Concurrency gate for one host.
+
+    With `adaptive=True` the limit follows AIMD: +`increase` per window of
+    healthy responses, x`decrease` on 429/503, timeouts or latency spikes
+    (at most once per smoothed RTT). `Retry-After` and `Crawl-delay` are
+    honoured in both modes.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        adaptive: bool = False,
+        minimum: int = 1,
+        maximum: int = 32,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        spike: float = 3.0,
+        crawl_delay: float = 0.0,
+    ):
+        self.limit = float(limit)
+        self.adaptive = adaptive
+        self.minimum = minimum
+        self.maximum = max(maximum, limit)
+        self.increase = increase
+        self.decrease = decrease
+        self.spike = spike
+        self.crawl_delay = crawl_delay
+        self.in_flight = 0
+        self.not_before = 0.0
+        self.ewma: Optional[float] = None
+        self.requests = 0
+        self.backoffs = 0
+        self._limit_sum = 0.0
+        self._last_start = 0.0
+        self._last_backoff = 0.0
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = max(self.not_before, self._last_start + self.crawl_delay) - now
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    break
+                try:
+                    await asyncio.wait_for(self._cond.wait(), wait if wait > 0 else None)
+                except asyncio.TimeoutError:
+                    pass
+            self.in_flight += 1
+            self.requests += 1
+            self._limit_sum += self.limit
+            self._last_start = now
+            if self._first is None:
+                self._first = now
+
+    async def release(
+        self,
+        status=None,
+        latency: Optional[float] = None,
+        timed_out: bool = False,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        async with self._cond:
+            now = time.monotonic()
+            self.in_flight -= 1
+            self._last = now
+            if retry_after is not None:
+                self.not_before = max(self.not_before, now + retry_after)
+            if self.adaptive:
+                self._feedback(now, status, latency, timed_out)
+            self._cond.notify_all()
+
+    def _feedback(self, now, status, latency, timed_out) -> None:
+        spiked = (
+            latency is not None
+            and self.ewma is not None
+            and latency > 0.1
+            and latency > self.spike * self.ewma
+        )
+        if timed_out or status in BACKOFF_STATUS or spiked:
+            if now - self._last_backoff >= (self.ewma or 0.1):
+                self.limit = max(float(self.minimum), self.limit * self.decrease)
+                self._last_backoff = now
+                self.backoffs += 1
+        elif isinstance(status, int) and status < 500:
+            self.limit = min(float(self.maximum), self.limit + self.increase / self.limit)
+        if latency is not None and not timed_out:
+            self.ewma = latency if self.ewma is None else 0.8 * self.ewma + 0.2 * latency
+
+    @property
+    def elapsed(self) -> float:
+        if self._first is None or self._last is None:
+            return 0.0
+        return self._last - self._first
+
+    @property
+    def rate(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mean_limit(self) -> float:
+        return self._limit_sum / self.requests if self.requests else self.limit
+
+
+class HostLimiter:
+    """One gate per host, created on first use."""
+
+    def __init__(self, per_host: int, adaptive: bool = False, max_per_host: int = 32, retries: int = 2):
+        self.per_host = per_host
+        self.adaptive = adaptive
+        self.max_per_host = max_per_host
+        self.retries = retries if adaptive else 0
+        self.gates: Dict[str, HostGate] = {}
+
+    def __call__(self, url: str) -> HostGate:
+        host = urlparse(url).netloc
+        if host not in self.gates:
+            self.gates[host] = HostGate(
+                self.per_host, adaptive=self.adaptive, maximum=self.max_per_host
+            )
+        return self.gates[host]
@@ -0,0 +1,51 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+from urllib.parse import urljoin
+
+USER_AGENT = "devx"
+
+
+@dataclass
+class Robots:
+    crawl_delay: Optional[float] = None
+    sitemaps: List[str] = field(default_factory=list)
+
+
+def parse_robots(text: str, agent: str = USER_AGENT) -> Robots:
+    """Reads `Crawl-delay` for our agent (falling back to `*`) and all `Sitemap` lines."""
+    robots = Robots()
+    delays = {}
+    agents, in_rules = [], False
+    for raw in text.splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        key, value = (part.strip() for part in line.split(":", 1))
+        key = key.lower()
+        if key == "sitemap":
+            robots.sitemaps.append(value)
+        elif key == "user-agent":
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(value.lower())
+        else:
+            in_rules = True
+            if key == "crawl-delay":
+                try:
+                    delay = float(value)
+                except ValueError:
+                    continue
+                for a in agents:
+                    delays.setdefault(a, delay)
+    robots.crawl_delay = delays.get(agent.lower(), delays.get("*"))
+    return robots
+
+
+async def fetch_robots(client, url: str) -> Robots:
+    try:
+        r = await client.get(urljoin(url, "/robots.txt"))
+    except Exception:
+        return Robots()
+    if r.status_code >= 400:
+        return Robots()
+    return parse_robots(r.text)
@@ -0,0 +1,107 @@
+import hashlib
+import re
+from collections import Counter, defaultdict, deque
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+WORD = re.compile(r"\w+", re.UNICODE)
+_NUMERIC = re.compile(r"\d")
+
+
+class SimHash:
+    """Incremental 64-bit SimHash over word shingles of the page text."""
+
+    def __init__(self, shingle: int = 3):
+        self._window = deque(maxlen=shingle)
+        self._weights = Counter()
+
+    def update(self, text: str) -> None:
+        for word in WORD.findall(text.lower()):
+            self._window.append(word)
+            if len(self._window) == self._window.maxlen:
+                self._weights[" ".join(self._window)] += 1
+
+    def digest(self) -> int:
+        weights = self._weights or Counter({" ".join(self._window): 1})
+        # Per-byte weight tables: 8 additions per feature instead of 64,
+        # then each bit is summed from 256 buckets.
+        tables = [[0] * 256 for _ in range(8)]
+        for feature, weight in weights.items():
+            h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+            for b in range(8):
+                tables[b][(h >> (8 * b)) & 0xFF] += weight
+        half = sum(weights.values()) / 2
+        value = 0
+        for b, table in enumerate(tables):
+            for bit in range(8):
+                if sum(w for v, w in enumerate(table) if v >> bit & 1) > half:
+                    value |= 1 << (8 * b + bit)
+        return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def url_pattern(url: str) -> str:
+    """URL shape used to group pages: numeric path segments and query values are dropped."""
+    parts = urlsplit(url)
+    path = "/".join("*" if _NUMERIC.search(seg) else seg for seg in parts.path.split("/"))
+    keys = sorted({k for k, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    return f"{parts.netloc}{path}" + (f"?{'&'.join(keys)}" if keys else "")
+
+
+class NearDuplicates:
+    """Clusters pages whose SimHash differs by at most `distance` bits.
+
+    Lookups split the 64 bits into `distance + 1` bands: two hashes within
+    `distance` bits share at least one band exactly. With `prune_after`,
+    links of a URL pattern stop being followed once that many of its pages
+    were near-duplicates. A `template` (the site's not-found page) marks
+    200 responses that match it as soft-404s.
+    """
+
+    def __init__(self, distance: int = 3, prune_after: int = 0):
+        self.distance = distance
+        self.prune_after = prune_after
+        self.template: Optional[int] = None
+        self.clusters: Dict[str, List[str]] = {}
+        self.pruned: Dict[str, int] = {}
+        self._hashes: Dict[str, int] = {}
+        self._bands = [defaultdict(list) for _ in range(distance + 1)]
+        self._dups = Counter()
+        bits = 64 // (distance + 1)
+        self._shifts = [i * bits for i in range(distance + 1)]
+        self._masks = [(1 << bits) - 1] * distance + [(1 << (64 - distance * bits)) - 1]
+
+    def _keys(self, fp: int):
+        return [(fp >> s) & m for s, m in zip(self._shifts, self._masks)]
+
+    def is_soft404(self, fp: int) -> bool:
+        return self.template is not None and hamming(fp, self.template) <= self.distance
+
+    def find(self, fp: int) -> Optional[str]:
+        for band, key in zip(self._bands, self._keys(fp)):
+            for url in band.get(key, ()):
+                if hamming(fp, self._hashes[url]) <= self.distance:
+                    return url
+        return None
+
+    def observe(self, url: str, fp: int) -> bool:
+        """Registers a page; returns False when its links should not be followed."""
+        pattern = url_pattern(url)
+        if pattern in self.pruned:
+            self.pruned[pattern] += 1
+            return False
+        original = self.find(fp)
+        if original is None:
+            self._hashes[url] = fp
+            for band, key in zip(self._bands, self._keys(fp)):
+                band[key].append(url)
+            return True
+        self.clusters.setdefault(original, [original]).append(url)
+        self._dups[pattern] += 1
+        if self.prune_after and self._dups[pattern] >= self.prune_after:
+            self.pruned[pattern] = 0
+            return False
+        return True
@@ -0,0 +1,111 @@
+import asyncio
+import zlib
+from typing import List
+from urllib.parse import urljoin
+from xml.etree import ElementTree as ET
+
+GZIP_MAGIC = b"\x1f\x8b"
+MAX_SITEMAPS = 50
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+# Extensions nest their own `loc` (`<image:loc>`, `<video:loc>`...); only these are the entry's.
+LOC_TAGS = (SITEMAP_NS + "loc", "loc")
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapParser:
+    """Incremental parser for `urlset` and `sitemapindex` documents.
+
+    Accepts raw bytes (gzip is detected by its magic number) and clears
+    every `<url>`/`<sitemap>` entry once read, so memory does not grow with
+    the size of the sitemap.
+    """
+
+    def __init__(self):
+        self._xml = ET.XMLPullParser(events=("start", "end"))
+        self._inflate = None
+        self._head = b""
+        self._root = None
+        self._open: List[str] = []
+        self._loc = None
+        self.urls: List[str] = []
+        self.sitemaps: List[str] = []
+
+    def feed(self, data: bytes) -> None:
+        if self._head is not None:
+            self._head += data
+            if len(self._head) < len(GZIP_MAGIC):
+                return
+            data, self._head = self._head, None
+            if data.startswith(GZIP_MAGIC):
+                self._inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._inflate is not None:
+            data = self._inflate.decompress(data)
+        self._xml.feed(data)
+        self._drain()
+
+    def close(self) -> None:
+        if self._head:
+            self._xml.feed(self._head)
+        if self._inflate is not None:
+            self._xml.feed(self._inflate.flush())
+        self._xml.close()
+        self._drain()
+
+    def _drain(self) -> None:
+        for event, el in self._xml.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = el
+                self._open.append(_local(el.tag))
+                continue
+            self._open.pop()
+            tag = _local(el.tag)
+            if el.tag in LOC_TAGS and self._open[-1:] in (["url"], ["sitemap"]):
+                self._loc = (el.text or "").strip()
+            elif tag in ("url", "sitemap"):
+                if self._loc:
+                    (self.urls if tag == "url" else self.sitemaps).append(self._loc)
+                self._loc = None
+                self._root.clear()
+
+
+async def fetch_sitemap(client, url: str) -> SitemapParser:
+    parser = SitemapParser()
+    try:
+        r = await client.send(client.build_request("GET", url), stream=True)
+    except Exception:
+        return parser
+    try:
+        if r.status_code < 400:
+            async for chunk in r.aiter_bytes():
+                parser.feed(chunk)
+            parser.close()
+    except (ET.ParseError, zlib.error):
+        pass
+    finally:
+        await r.aclose()
+    return parser
+
+
+async def sitemap_urls(client, root: str, sitemaps=None, limit: int = 50000, max_sitemaps: int = MAX_SITEMAPS) -> List[str]:
+    """Page URLs listed in `sitemaps` (default `/sitemap.xml`), following sitemap indexes.
+
+    Each round of sitemap files is fetched concurrently.
+    """
+    pending = list(sitemaps or [urljoin(root, "/sitemap.xml")])
+    seen, urls = set(), []
+    while pending and len(seen) < max_sitemaps and len(urls) < limit:
+        batch = []
+        for url in pending:
+            if url not in seen and len(seen) < max_sitemaps:
+                seen.add(url)
+                batch.append(url)
+        parsed = await asyncio.gather(*(fetch_sitemap(client, url) for url in batch))
+        pending = []
+        for parser in parsed:
+            urls.extend(parser.urls)
+            pending.extend(parser.sitemaps)
+    return urls[:limit]
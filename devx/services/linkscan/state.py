@@ -0,0 +1,203 @@
+import json
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    status,
+    etag TEXT,
+    last_modified TEXT,
+    links TEXT,
+    targets TEXT,
+    simhash TEXT,
+    fetched_at REAL
+);
+CREATE TABLE IF NOT EXISTS frontier (
+    url TEXT PRIMARY KEY,
+    level INTEGER NOT NULL,
+    pos INTEGER NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0
+);
+"""
+# Bump with every column added to SCHEMA, and list the column here so that
+# files written by older versions are upgraded in place (`PRAGMA user_version`).
+SCHEMA_VERSION = 2
+ADDED_COLUMNS = (("pages", "targets", "TEXT"), ("pages", "simhash", "TEXT"))
+
+
+@dataclass
+class Page:
+    """Outcome of fetching one page, as stored between runs."""
+
+    status: object
+    links: List[str] = field(default_factory=list)
+    targets: Tuple[List[str], List[str]] = field(default_factory=lambda: ([], []))
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    simhash: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "ERR" and self.status < 400
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class CrawlState:
+    """Crawl state kept in a SQLite file.
+
+    `pages` holds validators and outgoing links of every page fetched so far
+    (kept across runs for conditional recrawls); `frontier` is the BFS queue
+    of the current run, level by level, so an interrupted run can resume.
+    """
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.unchanged = 0
+        self.resumed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _migrate(self) -> None:
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        with self.conn:
+            for table, column, kind in ADDED_COLUMNS:
+                existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def start(self, root: str) -> bool:
+        """Starts a run for `root`, or resumes the unfinished one. Returns True when resuming."""
+        self.resumed = self._meta("root") == root and self._meta("complete") == "0"
+        if not self.resumed:
+            with self.conn:
+                self.conn.execute("DELETE FROM frontier")
+                self._set_meta("root", root)
+                self._set_meta("complete", "0")
+        return self.resumed
+
+    def finish(self) -> None:
+        with self.conn:
+            self._set_meta("complete", "1")
+
+    def levels(self) -> List[List[str]]:
+        """BFS levels of the current run, in queue order."""
+        levels: List[List[str]] = []
+        for url, level in self.conn.execute("SELECT url, level FROM frontier ORDER BY pos"):
+            while len(levels) <= level:
+                levels.append([])
+            levels[level].append(url)
+        return levels
+
+    def results(self) -> Dict[str, Page]:
+        """Pages already fetched in the current run."""
+        rows = self.conn.execute(
+            f"SELECT {_COLUMNS} FROM frontier f JOIN pages p ON p.url = f.url WHERE f.done = 1"
+        )
+        return {row[0]: _page(row) for row in rows}
+
+    def push_level(self, level: int, urls: List[str]) -> None:
+        with self.conn:
+            (pos,) = self.conn.execute("SELECT COALESCE(MAX(pos) + 1, 0) FROM frontier").fetchone()
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO frontier (url, level, pos) VALUES (?, ?, ?)",
+                ((url, level, pos + i) for i, url in enumerate(urls)),
+            )
+
+    def page(self, url: str) -> Optional[Page]:
+        """Stored page, if it is healthy and can be revalidated."""
+        row = self.conn.execute(f"SELECT {_COLUMNS} FROM pages p WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        page = _page(row)
+        if not isinstance(page.status, int) or not page.ok or not (page.etag or page.last_modified):
+            return None
+        return page
+
+    def targets(self, url: str) -> Tuple[List[str], List[str]]:
+        """Stored `(external, assets)` of a page."""
+        row = self.conn.execute("SELECT targets FROM pages WHERE url = ?", (url,)).fetchone()
+        external, assets = json.loads(row[0] if row and row[0] else "[[], []]")
+        return external, assets
+
+    def record(self, url: str, page: Page) -> Page:
+        """Stores a fetched page and marks it done.
+
+        A 304 takes the stored status, links, targets and SimHash (the caller
+        already reused links and targets).
+        """
+        if page.status == 304:
+            cached = self.page(url)
+            if cached is not None:
+                self.unchanged += 1
+                page.status = cached.status
+                page.etag = page.etag or cached.etag
+                page.last_modified = page.last_modified or cached.last_modified
+                if page.simhash is None:
+                    page.simhash = cached.simhash
+        simhash = f"{page.simhash:016x}" if page.simhash is not None else None
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages"
+                " (url, status, etag, last_modified, links, targets, simhash, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    page.status,
+                    page.etag,
+                    page.last_modified,
+                    json.dumps(page.links),
+                    json.dumps(list(page.targets)),
+                    simhash,
+                    time.time(),
+                ),
+            )
+            self.conn.execute("UPDATE frontier SET done = 1 WHERE url = ?", (url,))
+        return page
+
+
+_COLUMNS = "p.url, p.status, p.etag, p.last_modified, p.links, p.targets, p.simhash"
+
+
+def _page(row) -> Page:
+    _, status, etag, last_modified, links, targets, simhash = row
+    external, assets = json.loads(targets or "[[], []]")
+    return Page(
+        status,
+        json.loads(links or "[]"),
+        (external, assets),
+        etag,
+        last_modified,
+        int(simhash, 16) if simhash else None,
+    )
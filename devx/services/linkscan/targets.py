@@ -0,0 +1,129 @@
+import asyncio
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+from httpx import TimeoutException
+from .ratecontrol import BACKOFF_STATUS, parse_retry_after
+
+HEAD_FALLBACK = {403, 405, 501}
+
+
+async def probe(client, url):
+    """HEAD `url`, or a 1-byte ranged GET when the server rejects HEAD.
+
+    The returned response has its body unread.
+    """
+    r = await client.head(url)
+    if r.status_code not in HEAD_FALLBACK:
+        return r
+    await r.aclose()
+    request = client.build_request("GET", url, headers={"Range": "bytes=0-0"})
+    return await client.send(request, stream=True)
+
+
+def probe_sync(client, url):
+    """Blocking counterpart of `probe`, for the sequential crawler."""
+    r = client.head(url)
+    if r.status_code not in HEAD_FALLBACK:
+        return r
+    r.close()
+    request = client.build_request("GET", url, headers={"Range": "bytes=0-0"})
+    return client.send(request, stream=True)
+
+
+class ReferrerIndex:
+    """Target URL -> referring pages.
+
+    Every URL is interned once and referrers are kept as arrays of 32-bit
+    ids, so a CDN asset used by thousands of pages costs 4 bytes per page.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._urls: List[str] = []
+        self._refs: Dict[int, array] = {}
+
+    def _id(self, url: str) -> int:
+        i = self._ids.get(url)
+        if i is None:
+            i = self._ids[url] = len(self._urls)
+            self._urls.append(url)
+        return i
+
+    def add(self, target: str, page: str) -> None:
+        t, p = self._id(target), self._id(page)
+        refs = self._refs.get(t)
+        if refs is None:
+            refs = self._refs[t] = array("I")
+        if not refs or refs[-1] != p:
+            refs.append(p)
+
+    def __getitem__(self, target: str) -> List[str]:
+        t = self._ids.get(target)
+        if t is None or t not in self._refs:
+            return []
+        return [self._urls[p] for p in self._refs[t]]
+
+
+class TargetChecker:
+    """Checks assets and external links found while crawling.
+
+    Each unique target is requested once per crawl (HEAD first, ranged GET
+    fallback) through the per-host gates; later references only add a
+    referrer.
+    """
+
+    def __init__(self, assets: bool = True, external: bool = True, concurrency: int = 10):
+        self.assets = assets
+        self.external = external
+        self.concurrency = concurrency
+        self.results: Dict[str, object] = {}
+        self.referrers = ReferrerIndex()
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    @property
+    def requests(self) -> int:
+        return len(self._tasks)
+
+    def submit(self, client, limiter, page: str, links: List[str], assets: List[str]) -> None:
+        targets = (links if self.external else []) + (assets if self.assets else [])
+        for target in dict.fromkeys(targets):
+            self.referrers.add(target, page)
+            if target not in self._tasks:
+                self._tasks[target] = asyncio.ensure_future(self._check(client, limiter, target))
+
+    async def _check(self, client, limiter, url: str) -> None:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        gate = limiter(url)
+        async with self._sem:
+            for attempt in range(limiter.retries + 1):
+                await gate.acquire()
+                t0 = time.perf_counter()
+                status, latency, timed_out, retry_after = "ERR", None, False, None
+                try:
+                    r = await probe(client, url)
+                    status, latency = r.status_code, time.perf_counter() - t0
+                    if status in BACKOFF_STATUS:
+                        retry_after = parse_retry_after(r.headers.get("Retry-After"))
+                    await r.aclose()
+                except Exception as e:
+                    status, timed_out = "ERR", isinstance(e, TimeoutException)
+                finally:
+                    await gate.release(status, latency, timed_out=timed_out, retry_after=retry_after)
+                if status not in BACKOFF_STATUS:
+                    break
+        self.results[url] = status
+
+    async def drain(self) -> None:
+        await asyncio.gather(*self._tasks.values())
+
+    def broken(self) -> List[Tuple[str, object, List[str]]]:
+        """`(target, status, referrers)` for failed targets, in discovery order."""
+        return [
+            (url, status, self.referrers[url])
+            for url, status in ((u, self.results.get(u, "ERR")) for u in self._tasks)
+            if status == "ERR" or status >= 400
+        ]
+
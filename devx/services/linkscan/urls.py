@@ -0,0 +1,121 @@
+import hashlib
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left
+from urllib.parse import parse_qsl, urldefrag, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+_ESCAPE = re.compile(r"%[0-9a-fA-F]{2}")
+
+
+def canonicalize(url: str) -> str:
+    """Canonical form used for dedup: no fragment, lower-case scheme/host,
+    no default port, `/` for an empty path, normalized escapes and sorted query.
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if parts.username is not None:
+        userinfo = parts.username + (f":{parts.password}" if parts.password is not None else "")
+        netloc = f"{userinfo}@{host}"
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+    path = _ESCAPE.sub(lambda m: m.group(0).upper(), parts.path) or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def strip_fragment(url: str) -> str:
+    return urldefrag(url)[0]
+
+
+def fingerprint(url: str) -> int:
+    """64-bit fingerprint of the canonical URL."""
+    digest = hashlib.blake2b(canonicalize(url).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class FingerprintSet:
+    """Exact set of 64-bit fingerprints: ~8 bytes per URL in a sorted array,
+    plus a small buffer that is merged in when it fills up.
+    """
+
+    def __init__(self, buffer_size: int = 65536):
+        self._sorted = array("Q")
+        self._buffer = set()
+        self._buffer_size = buffer_size
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._buffer)
+
+    def _in_sorted(self, fp: int) -> bool:
+        i = bisect_left(self._sorted, fp)
+        return i < len(self._sorted) and self._sorted[i] == fp
+
+    def __contains__(self, url: str) -> bool:
+        fp = fingerprint(url)
+        return fp in self._buffer or self._in_sorted(fp)
+
+    def add(self, url: str) -> bool:
+        """Adds `url`; returns False if it (or an equivalent URL) was already there."""
+        fp = fingerprint(url)
+        if fp in self._buffer or self._in_sorted(fp):
+            return False
+        self._buffer.add(fp)
+        if len(self._buffer) >= self._buffer_size:
+            self._merge()
+        return True
+
+    def _merge(self) -> None:
+        # Only the buffer is sorted; the array is streamed, never copied to a list.
+        self._sorted = array("Q", heapq.merge(self._sorted, sorted(self._buffer)))
+        self._buffer.clear()
+
+
+class BloomFilter:
+    """Fixed-memory probabilistic visited set. False positives mean a page is
+    occasionally skipped; there are no false negatives.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _positions(self, url: str):
+        fp = fingerprint(url)
+        h1, h2 = fp & 0xFFFFFFFF, (fp >> 32) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, url: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(url))
+
+    def add(self, url: str) -> bool:
+        new = False
+        for p in self._positions(url):
+            mask = 1 << (p & 7)
+            if not self._bits[p >> 3] & mask:
+                self._bits[p >> 3] |= mask
+                new = True
+        if new:
+            self._count += 1
+        return new
+
+
+def make_visited(kind: str = "fingerprint", capacity: int = 1_000_000, error_rate: float = 0.001):
+    if kind == "bloom":
+        return BloomFilter(capacity, error_rate)
+    if kind == "fingerprint":
+        return FingerprintSet()
+    raise ValueError(f"unknown visited set: {kind!r}")
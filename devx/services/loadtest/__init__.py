@@ -1 +1 @@
-__all__ = ["cli", "engine"]
+__all__ = ["cli", "engine", "metrics", "calibration", "compare", "replay", "streams"]
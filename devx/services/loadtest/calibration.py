@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .metrics import Histogram
+
+LOOP_LAG_LIMIT = 0.05  # s (p99)
+DRIFT_LIMIT = 0.05  # s (p99)
+CPU_LIMIT = 90.0  # % de un core
+RATE_TOLERANCE = 0.95
+
+
+@dataclass
+class Calibration:
+    target_rps: float = 0.0
+    dispatched: int = 0
+    dispatch_span: float = 0.0
+    planned_span: float = 0.0
+    cpu_percent: float = 0.0
+    wall_seconds: float = 0.0
+    workers: int = 1
+    loop_lag: Histogram = field(default_factory=Histogram)
+    drift: Histogram = field(default_factory=Histogram)
+
+    @property
+    def achieved_rps(self) -> float:
+        if not self.dispatched or not self.target_rps:
+            return 0.0
+        return self.dispatched / (self.dispatch_span + 1 / self.target_rps)
+
+    def warnings(self) -> List[str]:
+        if not self.dispatched:
+            return []
+        lag = self.loop_lag.percentile(99)
+        drift = self.drift.percentile(99)
+        short = self.achieved_rps < self.target_rps * RATE_TOLERANCE
+        if not (short or lag > LOOP_LAG_LIMIT or drift > DRIFT_LIMIT or self.cpu_percent >= CPU_LIMIT):
+            return []
+        suggested = self.workers + 1
+        if short and self.achieved_rps:
+            suggested = max(suggested, math.ceil(self.workers * self.target_rps / self.achieved_rps))
+        return [
+            f"Client-bound run: sent {self.achieved_rps:.1f} of {self.target_rps:.1f} rps "
+            f"({self.achieved_rps / self.target_rps:.0%}), event-loop lag p99 {lag * 1000:.1f} ms, "
+            f"send drift p99 {drift * 1000:.1f} ms, CPU {self.cpu_percent:.0f}%. "
+            f"Latencies describe devx, not the server; retry with --workers {suggested}."
+        ]
+
+    @property
+    def valid(self) -> bool:
+        return not self.warnings()
+
+    def to_json(self) -> Dict[str, object]:
+        return {
+            "target_rps": self.target_rps,
+            "achieved_rps": self.achieved_rps,
+            "workers": self.workers,
+            "cpu_percent": self.cpu_percent,
+            "loop_lag_p99": self.loop_lag.percentile(99),
+            "loop_lag_max": self.loop_lag.max,
+            "drift_p50": self.drift.percentile(50),
+            "drift_p99": self.drift.percentile(99),
+            "drift_max": self.drift.max,
+            "valid": self.valid,
+            "warnings": self.warnings(),
+        }
+
+    @classmethod
+    def merge(cls, parts: List["Calibration"]) -> "Calibration":
+        return cls(
+            target_rps=sum(p.target_rps for p in parts),
+            dispatched=sum(p.dispatched for p in parts),
+            dispatch_span=max((p.dispatch_span for p in parts), default=0.0),
+            planned_span=max((p.planned_span for p in parts), default=0.0),
+            cpu_percent=max((p.cpu_percent for p in parts), default=0.0),
+            wall_seconds=max((p.wall_seconds for p in parts), default=0.0),
+            workers=len(parts),
+            loop_lag=Histogram(v for p in parts for v in p.loop_lag.values),
+            drift=Histogram(v for p in parts for v in p.drift.values),
+        )
+
+
+class LoopMonitor:
+    """Measures how late the event loop wakes a task that sleeps `interval` seconds."""
+
+    def __init__(self, calibration: Calibration, interval: float = 0.01):
+        self.calibration = calibration
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._cpu0 = 0.0
+        self._wall0 = 0.0
+        self._sent: Optional[tuple] = None
+
+    async def _run(self):
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.calibration.loop_lag.record(max(0.0, time.perf_counter() - t0 - self.interval))
+
+    def start(self) -> None:
+        self._cpu0 = time.process_time()
+        self._wall0 = time.perf_counter()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def mark_sent(self) -> None:
+        """Ends the send window: CPU% is measured up to here, not over the drain."""
+        self._sent = (time.process_time(), time.perf_counter())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        cpu, now = time.process_time(), time.perf_counter()
+        wall = now - self._wall0
+        self.calibration.wall_seconds = wall
+        if self._sent is not None and self._sent[1] - self._wall0 >= self.interval:
+            cpu, now = self._sent
+        if now > self._wall0:
+            self.calibration.cpu_percent = (cpu - self._cpu0) / (now - self._wall0) * 100
@@ -1,13 +1,104 @@
 import asyncio
 import json
+from pathlib import Path
+from typing import Optional
 import typer
 from rich import print
 from rich.table import Table
 from devx.core import logging as log
-from .engine import run_load
+from .compare import compare, load_baseline, meta_mismatches, save_baseline
+from .engine import PHASES, run_load_detailed, run_workers, to_json
+from .metrics import Histogram
+from .replay import SAFE_METHODS, iter_log, plan_from_log, run_replay
+from .streams import run_sse, run_websocket
 
 app = typer.Typer()
 
+PHASE_LABELS = {
+    "dns": "DNS",
+    "connect": "TCP connect",
+    "tls": "TLS handshake",
+    "ttfb": "TTFB",
+    "body": "Body transfer",
+}
+
+def _print_results(res, total: int) -> None:
+    lat, codes, errors = res.latencies, res.codes, res.errors
+    ok = sum(1 for c in codes if 200 <= c < 400)
+    table = Table(title="Results")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    table.add_row("Total", str(total))
+    table.add_row("Success (2xx/3xx)", str(ok))
+    table.add_row("Errors", str(errors + (total - ok - errors)))
+    if lat:
+        hist = Histogram(lat)
+        table.add_row("Mean (s)", f"{hist.mean:.4f}")
+        table.add_row("P95 (s)", f"{hist.percentile(95):.4f}")
+        table.add_row("Max (s)", f"{hist.max:.4f}")
+    if res.new_connections or res.reused_connections:
+        table.add_row("Connection reuse", f"{res.reuse_ratio:.1%}")
+    cal = res.calibration
+    table.add_row("Achieved send rate (rps)", f"{cal.achieved_rps:.1f}")
+    table.add_row("Loop lag P99 (ms)", f"{cal.loop_lag.percentile(99) * 1000:.1f}")
+    table.add_row("Send drift P99 (ms)", f"{cal.drift.percentile(99) * 1000:.1f}")
+    table.add_row("Client CPU (%)", f"{cal.cpu_percent:.0f}")
+    print(table)
+
+    if any(res.phases[p].count for p in PHASES):
+        phases = Table(title="Latency phases (s)")
+        phases.add_column("Phase")
+        for col in ("Count", "Mean", "P50", "P95", "P99", "Max"):
+            phases.add_column(col, justify="right")
+        for name in PHASES:
+            h = res.phases[name]
+            if not h.count:
+                continue
+            phases.add_row(
+                PHASE_LABELS[name],
+                str(h.count),
+                f"{h.mean:.4f}",
+                f"{h.percentile(50):.4f}",
+                f"{h.percentile(95):.4f}",
+                f"{h.percentile(99):.4f}",
+                f"{h.max:.4f}",
+            )
+        print(phases)
+
+    for warning in cal.warnings():
+        print(f"[yellow]⚠ {warning}[/yellow]")
+
+
+def _print_stream(res) -> None:
+    table = Table(title=f"Results ({res.mode})")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    table.add_row("Connections open", str(res.opened))
+    table.add_row("Connections failed", str(res.failed))
+    table.add_row("Dropped by server", str(res.dropped))
+    rows = [("Connect", res.connect), ("Round trip", res.rtt), ("First event", res.first_event)]
+    for label, h in rows:
+        if h.count:
+            table.add_row(f"{label} P50 (s)", f"{h.percentile(50):.4f}")
+            table.add_row(f"{label} P99 (s)", f"{h.percentile(99):.4f}")
+    if res.mode == "websocket":
+        table.add_row("Messages sent", str(res.sent))
+    table.add_row("Messages received", str(res.received))
+    table.add_row("Messages/s", f"{res.messages_per_second:.1f}")
+    print(table)
+    for warning in res.calibration.warnings():
+        print(f"[yellow]⚠ {warning}[/yellow]")
+
+
+def _write_json(res, json_out: Optional[Path]) -> None:
+    if not json_out:
+        return
+    target = json_out if json_out.parent != Path(".") else Path("reports/loadtest") / json_out.name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(to_json(res), indent=2), encoding="utf-8")
+    print(f"💾 JSON: {target}")
+
+
 @app.command("run")
 def run(
     url: str = typer.Argument(..., help="Endpoint"),
@@ -18,28 +109,157 @@ def run(
     data: str = typer.Option(None, help="Raw body or JSON"),
     headers: str = typer.Option(None, help="JSON headers"),
     verify_ssl: bool = typer.Option(True, help="Verify TLS"),
+    workers: int = typer.Option(1, "--workers", min=1, help="Generator processes (split rps)"),
+    json_out: Optional[Path] = typer.Option(None, "--json", help="Save results as JSON (simple names go to reports/loadtest)"),
+    save: Optional[Path] = typer.Option(None, "--save", help="Save latency distribution as a baseline file"),
+    compare_to: Optional[Path] = typer.Option(None, "--compare", help="Baseline file to compare against"),
+    tolerance: float = typer.Option(0.10, "--tolerance", help="Allowed relative regression (0.10 = 10%)"),
 ):
     _ = log.setup()
     hdrs = json.loads(headers) if headers else {}
     body = json.loads(data) if data and data.strip().startswith("{") else data
+    baseline = None
+    if compare_to:
+        try:
+            baseline = load_baseline(compare_to)
+        except (OSError, ValueError) as e:
+            raise typer.BadParameter(str(e), param_hint="--compare")
 
     print(f"[bold]🚀 Load test[/bold] {url} | {method} | {rps} rps x {duration}s")
-    lat, codes, errors = asyncio.run(
-        run_load(url, rps, duration, method, timeout, hdrs, body, verify_ssl)
-    )
+    if workers > 1:
+        res = run_workers(
+            url, rps, duration, method, timeout, hdrs, body, verify_ssl, workers
+        )
+    else:
+        res = asyncio.run(
+            run_load_detailed(url, rps, duration, method, timeout, hdrs, body, verify_ssl)
+        )
 
-    total = rps * duration
-    ok = sum(1 for c in codes if 200 <= c < 400)
-    table = Table(title="Results")
-    table.add_column("Metric")
-    table.add_column("Value", justify="right")
-    table.add_row("Total", str(total))
-    table.add_row("Success (2xx/3xx)", str(ok))
-    table.add_row("Errors", str(errors + (total - ok - errors)))
-    if lat:
-        from statistics import mean, quantiles
+    _print_results(res, total=rps * duration)
+    _write_json(res, json_out)
 
-        table.add_row("Mean (s)", f"{mean(lat):.4f}")
-        table.add_row("P95 (s)", f"{quantiles(lat, n=20)[18]:.4f}")
-        table.add_row("Max (s)", f"{max(lat):.4f}")
-    print(table)
+    meta = {"url": url, "method": method, "rps": rps, "duration": duration, "workers": workers}
+    if save:
+        save_baseline(save, res, meta)
+        print(f"💾 Baseline: {save}")
+
+    if baseline is not None:
+        changes = compare(baseline, res, tolerance=tolerance)
+        cmp_table = Table(title=f"Comparison vs {compare_to}")
+        cmp_table.add_column("Metric")
+        for col in ("Baseline", "Current", "Change", "95% CI (Δ)", "p-value"):
+            cmp_table.add_column(col, justify="right")
+        cmp_table.add_column("Test")
+        cmp_table.add_column("Verdict")
+        for m in changes:
+            verdict = "[red]regression[/red]" if m.regression else (
+                "changed" if m.significant else "≈"
+            )
+            cmp_table.add_row(
+                m.name,
+                f"{m.baseline:.4f}",
+                f"{m.current:.4f}",
+                f"{m.change:+.1%}",
+                f"[{m.ci[0]:+.4f}, {m.ci[1]:+.4f}]" if m.ci else "-",
+                f"{m.p_value:.3g}" if m.p_value is not None else "-",
+                m.test,
+                verdict,
+            )
+        print(cmp_table)
+        for mismatch in meta_mismatches(baseline, meta):
+            print(f"[yellow]⚠ Baseline was recorded with different settings ({mismatch}); the comparison is not like for like.[/yellow]")
+        if not res.calibration.valid:
+            print("[yellow]⚠ This run is client-bound; the comparison may not reflect the server.[/yellow]")
+        if any(m.regression for m in changes):
+            print(f"[red]✖ Regression beyond tolerance ({tolerance:.0%}).[/red]")
+            raise typer.Exit(code=2)
+
+
+@app.command("replay")
+def replay(
+    log_file: Path = typer.Argument(..., exists=True, dir_okay=False, help="nginx/combined access log (.gz ok)"),
+    target: str = typer.Option(..., "--target", help="Base URL to replay against"),
+    speed: float = typer.Option(1.0, "--speed", min=0.001, help="Time scale for the original timing (2 = twice as fast)"),
+    rps: Optional[float] = typer.Option(None, "--rps", help="Fixed rate instead of the original timing"),
+    limit: Optional[int] = typer.Option(None, "--limit", help="Replay at most N requests"),
+    timeout: float = typer.Option(10.0),
+    headers: str = typer.Option(None, help="JSON headers"),
+    verify_ssl: bool = typer.Option(True, help="Verify TLS"),
+    all_methods: bool = typer.Option(False, "--all-methods", help="Also replay non GET/HEAD requests (without body)"),
+    top: int = typer.Option(20, "--top", help="Paths shown in the breakdown (0 = all)"),
+    json_out: Optional[Path] = typer.Option(None, "--json", help="Save results as JSON (simple names go to reports/loadtest)"),
+):
+    _ = log.setup()
+    hdrs = json.loads(headers) if headers else {}
+    pace = f"{rps} rps" if rps else f"x{speed} original timing"
+    print(f"[bold]🔁 Replay[/bold] {log_file} → {target} | {pace}")
+
+    entries = iter_log(log_file, methods=None if all_methods else SAFE_METHODS)
+    plan = plan_from_log(entries, speed=speed, rps=rps, limit=limit)
+    res = asyncio.run(run_replay(target, plan, timeout, hdrs, verify_ssl, rps=rps))
+
+    _print_results(res, total=res.calibration.dispatched)
+
+    rows = sorted(res.paths.items(), key=lambda kv: kv[1].count, reverse=True)
+    failed_only = [(p, None) for p in res.path_errors if p not in res.paths]
+    rows = rows + failed_only
+    if top > 0:
+        rows = rows[:top]
+    if rows:
+        table = Table(title="Latency by path (s)")
+        table.add_column("Path")
+        for col in ("Count", "Errors", "P50", "P95", "P99", "Max"):
+            table.add_column(col, justify="right")
+        for path, h in rows:
+            h = h or Histogram()
+            table.add_row(
+                path,
+                str(h.count),
+                str(res.path_errors.get(path, 0)),
+                f"{h.percentile(50):.4f}",
+                f"{h.percentile(95):.4f}",
+                f"{h.percentile(99):.4f}",
+                f"{h.max:.4f}",
+            )
+        print(table)
+    _write_json(res, json_out)
+
+
+@app.command("ws")
+def ws(
+    url: str = typer.Argument(..., help="ws:// or wss:// endpoint"),
+    connections: int = typer.Option(10, "--connections", min=1, help="Concurrent connections"),
+    duration: int = typer.Option(10, help="Seconds"),
+    msg_rate: float = typer.Option(1.0, "--msg-rate", help="Messages per second on each connection"),
+    message: str = typer.Option("ping", "--message", help="Payload prefix (a unique suffix is added)"),
+    timeout: float = typer.Option(10.0, help="Connect timeout and max wait for pending echoes"),
+    headers: str = typer.Option(None, help="JSON headers"),
+    verify_ssl: bool = typer.Option(True, help="Verify TLS"),
+):
+    _ = log.setup()
+    hdrs = json.loads(headers) if headers else {}
+    print(f"[bold]🔌 WebSocket load[/bold] {url} | {connections} conns x {msg_rate} msg/s x {duration}s")
+    try:
+        res = asyncio.run(
+            run_websocket(url, connections, duration, msg_rate, message, timeout, hdrs, verify_ssl)
+        )
+    except RuntimeError as e:
+        print(f"[red]{e}[/red]")
+        raise typer.Exit(code=1)
+    _print_stream(res)
+
+
+@app.command("sse")
+def sse(
+    url: str = typer.Argument(..., help="Server-Sent-Events endpoint"),
+    connections: int = typer.Option(10, "--connections", min=1, help="Concurrent streams"),
+    duration: int = typer.Option(10, help="Seconds"),
+    timeout: float = typer.Option(10.0, help="Connect timeout"),
+    headers: str = typer.Option(None, help="JSON headers"),
+    verify_ssl: bool = typer.Option(True, help="Verify TLS"),
+):
+    _ = log.setup()
+    hdrs = json.loads(headers) if headers else {}
+    print(f"[bold]📡 SSE load[/bold] {url} | {connections} streams x {duration}s")
+    res = asyncio.run(run_sse(url, connections, duration, timeout, hdrs, verify_ssl))
+    _print_stream(res)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import math
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .engine import LoadResult, to_json
+from .metrics import Histogram
+
+BASELINE_VERSION = 1
+
+
+@dataclass
+class MetricChange:
+    name: str
+    baseline: float
+    current: float
+    higher_is_worse: bool
+    ci: Optional[Tuple[float, float]] = None  # IC de (actual - baseline)
+    p_value: Optional[float] = None
+    significant: bool = False
+    regression: bool = False
+    test: str = ""  # cómo se decide `significant`
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline if self.baseline else 0.0
+
+
+def save_baseline(path: Path, result: LoadResult, meta: Optional[Dict[str, object]] = None) -> None:
+    payload = {
+        "version": BASELINE_VERSION,
+        "meta": meta or {},
+        "throughput": result.throughput,
+        "latencies": [round(v, 6) for v in result.latencies],
+        "summary": to_json(result),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload), encoding="utf-8")
+
+
+def load_baseline(path: Path) -> Dict[str, object]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("version") != BASELINE_VERSION or "latencies" not in data:
+        raise ValueError(f"{path} is not a loadtest baseline (use --save to create one)")
+    return data
+
+
+COMPARED_META = ("url", "method", "rps")
+
+
+def meta_mismatches(baseline: Dict[str, object], meta: Dict[str, object]) -> List[str]:
+    """Settings that differ between the baseline run and this one (a comparison across them is not like for like)."""
+    saved = baseline.get("meta") or {}
+    return [
+        f"{key}: baseline {saved[key]!r}, current {meta.get(key)!r}"
+        for key in COMPARED_META
+        if key in saved and saved[key] != meta.get(key)
+    ]
+
+
+def mann_whitney(a: Sequence[float], b: Sequence[float]) -> Tuple[float, float]:
+    """Two-sided Mann-Whitney U test (normal approximation with tie correction)."""
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return 0.0, 1.0
+    merged = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    n = n1 + n2
+    rank_sum_a = 0.0
+    ties = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and merged[j + 1][0] == merged[i][0]:
+            j += 1
+        avg_rank = (i + j) / 2 + 1
+        t = j - i + 1
+        ties += t**3 - t
+        rank_sum_a += avg_rank * sum(1 for k in range(i, j + 1) if merged[k][1] == 0)
+        i = j + 1
+    u = rank_sum_a - n1 * (n1 + 1) / 2
+    mu = n1 * n2 / 2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))) if n > 1 else 0.0
+    if sigma == 0:
+        return u, 1.0
+    z = (abs(u - mu) - 0.5) / sigma
+    return u, min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def bootstrap_ci(
+    a: Sequence[float],
+    b: Sequence[float],
+    q: float,
+    iterations: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 0,
+    max_samples: int = 5000,
+) -> Tuple[float, float]:
+    """Bootstrap CI for percentile(b, q) - percentile(a, q)."""
+    rng = random.Random(seed)
+    a = rng.sample(list(a), max_samples) if len(a) > max_samples else list(a)
+    b = rng.sample(list(b), max_samples) if len(b) > max_samples else list(b)
+    if not a or not b:
+        return 0.0, 0.0
+    diffs = sorted(
+        Histogram(rng.choices(b, k=len(b))).percentile(q)
+        - Histogram(rng.choices(a, k=len(a))).percentile(q)
+        for _ in range(iterations)
+    )
+    lo = int((1 - confidence) / 2 * iterations)
+    hi = max(lo, int((1 + confidence) / 2 * iterations) - 1)
+    return diffs[lo], diffs[hi]
+
+
+def compare(
+    baseline: Dict[str, object],
+    result: LoadResult,
+    tolerance: float = 0.10,
+    alpha: float = 0.05,
+    iterations: int = 1000,
+    seed: int = 0,
+) -> List[MetricChange]:
+    base_lat = baseline["latencies"]
+    cur_lat = result.latencies
+    _, p_value = mann_whitney(base_lat, cur_lat)
+
+    changes = []
+    base_tp = float(baseline.get("throughput") or 0.0)
+    # Un solo valor por run: no hay distribución que contrastar, solo un umbral.
+    tp = MetricChange("Throughput (rps)", base_tp, result.throughput, higher_is_worse=False, test=f"threshold ±{tolerance:.0%}")
+    tp.significant = abs(tp.change) > tolerance
+    tp.regression = tp.change < -tolerance
+    changes.append(tp)
+
+    for name, q in (("P50 (s)", 50), ("P99 (s)", 99)):
+        m = MetricChange(
+            name,
+            Histogram(base_lat).percentile(q),
+            Histogram(cur_lat).percentile(q),
+            higher_is_worse=True,
+            ci=bootstrap_ci(base_lat, cur_lat, q, iterations=iterations, seed=seed),
+            p_value=p_value if q == 50 else None,
+            test="Mann-Whitney + bootstrap CI" if q == 50 else "bootstrap CI",
+        )
+        excludes_zero = m.ci[0] > 0 or m.ci[1] < 0
+        # P50 se apoya también en Mann-Whitney; las colas solo en el IC bootstrap.
+        m.significant = excludes_zero and (m.p_value is None or m.p_value < alpha)
+        m.regression = m.significant and m.ci[0] > 0 and m.change > tolerance
+        changes.append(m)
+    return changes
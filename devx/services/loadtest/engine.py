@@ -1,33 +1,410 @@
 import asyncio
+import contextvars
+import socket
 import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpcore
 import httpx
+from httpx import AsyncBaseTransport, AsyncByteStream, create_ssl_context
 
-async def run_load(url, rps, duration, method, timeout, headers, body, verify_ssl):
-    async with httpx.AsyncClient(
-        timeout=timeout, verify=verify_ssl, follow_redirects=True
-    ) as client:
-        latencies, codes, errors = [], [], 0
-        start = time.perf_counter()
-        for sec in range(duration):
-            t0 = time.perf_counter()
-            tasks = [
-                client.request(
-                    method,
-                    url,
-                    headers=headers,
-                    json=body if isinstance(body, dict) else None,
-                    content=None if isinstance(body, dict) else body,
+from .calibration import Calibration, LoopMonitor
+from .metrics import Histogram
+
+PHASES = ("dns", "connect", "tls", "ttfb", "body")
+
+_CURRENT_TRACE: contextvars.ContextVar = contextvars.ContextVar(
+    "devx_loadtest_trace", default=None
+)
+
+
+class PhaseTrace:
+    """Collects httpcore trace events (and DNS time) for a single request."""
+
+    def __init__(self):
+        self.marks: Dict[str, float] = {}
+        self.dns: Optional[float] = None
+
+    async def __call__(self, name: str, info: dict) -> None:
+        # "http11.send_request_headers.started" -> "send_request_headers.started"
+        self.marks[name.split(".", 1)[-1]] = time.perf_counter()
+
+    @property
+    def new_connection(self) -> bool:
+        return "connect_tcp.started" in self.marks
+
+    def _span(self, step: str) -> Optional[float]:
+        start = self.marks.get(f"{step}.started")
+        end = self.marks.get(f"{step}.complete")
+        if start is None or end is None:
+            return None
+        return end - start
+
+    def phases(self) -> Dict[str, float]:
+        out: Dict[str, float] = {}
+        if self.dns is not None:
+            out["dns"] = self.dns
+        connect = self._span("connect_tcp")
+        if connect is not None:
+            out["connect"] = max(0.0, connect - (self.dns or 0.0))
+        tls = self._span("start_tls")
+        if tls is not None:
+            out["tls"] = tls
+        sent = self.marks.get("send_request_headers.started")
+        headers = self.marks.get("receive_response_headers.complete")
+        if sent is not None and headers is not None:
+            out["ttfb"] = headers - sent
+        body = self._span("receive_response_body")
+        if body is not None:
+            out["body"] = body
+        return out
+
+
+class _ResolvingBackend(httpcore.AsyncNetworkBackend):
+    """Resolves the host itself so DNS time can be told apart from TCP connect."""
+
+    def __init__(self, inner: httpcore.AsyncNetworkBackend):
+        self._inner = inner
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        trace = _CURRENT_TRACE.get()
+        t0 = time.perf_counter()
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, port, type=socket.SOCK_STREAM
+        )
+        if trace is not None:
+            trace.dns = time.perf_counter() - t0
+        # Like the default backend, try each resolved address until one connects.
+        error: Optional[Exception] = None
+        for address in dict.fromkeys(info[4][0] for info in infos):
+            try:
+                return await self._inner.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options,
                 )
-                for _ in range(rps)
-            ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            for r in results:
-                if isinstance(r, Exception):
-                    errors += 1
-                else:
-                    codes.append(r.status_code)
-                    latencies.append(time.perf_counter() - t0)
-            sleep = (sec + 1) - (time.perf_counter() - start)
-            if sleep > 0:
-                await asyncio.sleep(sleep)
-        return latencies, codes, errors
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        raise error or httpcore.ConnectError(f"no address found for {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._inner.connect_unix_socket(
+            path, timeout=timeout, socket_options=socket_options
+        )
+
+    async def sleep(self, seconds: float) -> None:
+        await self._inner.sleep(seconds)
+
+
+# httpcore -> httpx exceptions, as in httpx's default transport: the most
+# specific match wins, so a ReadTimeout stays a ReadTimeout.
+_EXCEPTIONS = {
+    httpcore.TimeoutException: httpx.TimeoutException,
+    httpcore.ConnectTimeout: httpx.ConnectTimeout,
+    httpcore.ReadTimeout: httpx.ReadTimeout,
+    httpcore.WriteTimeout: httpx.WriteTimeout,
+    httpcore.PoolTimeout: httpx.PoolTimeout,
+    httpcore.NetworkError: httpx.NetworkError,
+    httpcore.ConnectError: httpx.ConnectError,
+    httpcore.ReadError: httpx.ReadError,
+    httpcore.WriteError: httpx.WriteError,
+    httpcore.ProxyError: httpx.ProxyError,
+    httpcore.UnsupportedProtocol: httpx.UnsupportedProtocol,
+    httpcore.ProtocolError: httpx.ProtocolError,
+    httpcore.LocalProtocolError: httpx.LocalProtocolError,
+    httpcore.RemoteProtocolError: httpx.RemoteProtocolError,
+}
+
+
+def _map_error(exc: Exception, request: Optional[httpx.Request] = None) -> Exception:
+    """The httpx exception for an httpcore one (`exc` itself if none applies)."""
+    mapped = None
+    for source, target in _EXCEPTIONS.items():
+        if isinstance(exc, source) and (mapped is None or issubclass(target, mapped)):
+            mapped = target
+    return exc if mapped is None else mapped(str(exc), request=request)
+
+
+class _ResponseStream(AsyncByteStream):
+    def __init__(self, stream, request: httpx.Request):
+        self._stream = stream
+        self._request = request
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except Exception as e:
+            error = _map_error(e, self._request)
+            if error is e:
+                raise
+            raise error from e
+
+    async def aclose(self) -> None:
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class _TracingTransport(AsyncBaseTransport):
+    """An httpcore connection pool on `_ResolvingBackend`, built through the
+    public httpcore API, so DNS time is measured on every new connection.
+
+    Like httpx's own transport it supports HTTP/2 and, with `trust_env`, the
+    `*_proxy`/`no_proxy` environment variables (one pool per proxy).
+    """
+
+    def __init__(self, verify_ssl, http2: bool = False, trust_env: bool = True):
+        self._options = dict(
+            ssl_context=create_ssl_context(verify=verify_ssl, trust_env=trust_env),
+            # Same pool limits as httpx's default transport.
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=5.0,
+            http2=http2,
+            network_backend=_ResolvingBackend(httpcore.AnyIOBackend()),
+        )
+        self._proxies = urllib.request.getproxies() if trust_env else {}
+        self._pool = httpcore.AsyncConnectionPool(**self._options)
+        self._proxy_pools: Dict[str, httpcore.AsyncConnectionPool] = {}
+
+    def _pool_for(self, url: httpx.URL):
+        proxy = self._proxies.get(url.scheme) or self._proxies.get("all")
+        if not proxy or urllib.request.proxy_bypass(url.host):
+            return self._pool
+        pool = self._proxy_pools.get(proxy)
+        if pool is None:
+            if "://" not in proxy:
+                proxy = "http://" + proxy
+            cls = httpcore.AsyncSOCKSProxy if proxy.startswith("socks") else httpcore.AsyncHTTPProxy
+            pool = self._proxy_pools[proxy] = cls(proxy_url=proxy, **self._options)
+        return pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        req = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        try:
+            resp = await self._pool_for(request.url).handle_async_request(req)
+        except Exception as e:
+            error = _map_error(e, request)
+            if error is e:
+                raise
+            raise error from e
+        return httpx.Response(
+            status_code=resp.status,
+            headers=resp.headers,
+            stream=_ResponseStream(resp.stream, request),
+            extensions=resp.extensions,
+        )
+
+    async def aclose(self) -> None:
+        for pool in [self._pool, *self._proxy_pools.values()]:
+            await pool.aclose()
+
+
+@dataclass
+class LoadResult:
+    latencies: List[float] = field(default_factory=list)
+    codes: List[int] = field(default_factory=list)
+    errors: int = 0
+    phases: Dict[str, Histogram] = field(
+        default_factory=lambda: {p: Histogram() for p in PHASES}
+    )
+    new_connections: int = 0
+    reused_connections: int = 0
+    calibration: Calibration = field(default_factory=Calibration)
+    paths: Dict[str, Histogram] = field(default_factory=dict)
+    path_errors: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def reuse_ratio(self) -> float:
+        total = self.new_connections + self.reused_connections
+        return self.reused_connections / total if total else 0.0
+
+    @property
+    def throughput(self) -> float:
+        wall = self.calibration.wall_seconds
+        ok = sum(1 for c in self.codes if 200 <= c < 400)
+        return ok / wall if wall else 0.0
+
+    def add_trace(self, trace: PhaseTrace) -> None:
+        if not trace.marks:
+            return
+        if trace.new_connection:
+            self.new_connections += 1
+        else:
+            self.reused_connections += 1
+        for name, value in trace.phases().items():
+            self.phases[name].record(value)
+
+    @classmethod
+    def merge(cls, parts: List["LoadResult"]) -> "LoadResult":
+        merged = cls(
+            calibration=Calibration.merge([p.calibration for p in parts]),
+            phases={
+                name: Histogram(v for p in parts for v in p.phases[name].values)
+                for name in PHASES
+            },
+        )
+        for p in parts:
+            merged.latencies.extend(p.latencies)
+            merged.codes.extend(p.codes)
+            merged.errors += p.errors
+            merged.new_connections += p.new_connections
+            merged.reused_connections += p.reused_connections
+        return merged
+
+
+def make_client(timeout, verify_ssl, http2: bool = False, trust_env: bool = True):
+    return httpx.AsyncClient(
+        timeout=timeout,
+        verify=verify_ssl,
+        follow_redirects=True,
+        trust_env=trust_env,
+        transport=_TracingTransport(verify_ssl, http2=http2, trust_env=trust_env),
+    )
+
+
+async def send_one(client, method, url, headers, body, result: LoadResult) -> Optional[float]:
+    """Sends one request, records it in `result` and returns its latency (None on error)."""
+    trace = PhaseTrace()
+    token = _CURRENT_TRACE.set(trace)
+    t0 = time.perf_counter()
+    try:
+        r = await client.request(
+            method,
+            url,
+            headers=headers,
+            json=body if isinstance(body, dict) else None,
+            content=None if isinstance(body, dict) else body,
+            extensions={"trace": trace},
+        )
+    except Exception:
+        result.errors += 1
+        return None
+    finally:
+        _CURRENT_TRACE.reset(token)
+    latency = time.perf_counter() - t0
+    result.codes.append(r.status_code)
+    result.latencies.append(latency)
+    result.add_trace(trace)
+    return latency
+
+
+async def run_schedule(
+    plan: Iterable[Tuple[float, object]],
+    fire: Callable[[object], Awaitable[None]],
+    calibration: Calibration,
+) -> None:
+    """Open-loop scheduler: dispatches `fire(item)` at each planned offset (s).
+
+    Sends never wait for earlier responses; how far each one slips behind its
+    planned time is recorded as drift in `calibration`.
+    """
+    monitor = LoopMonitor(calibration)
+    monitor.start()
+    pending = set()
+    dispatched = 0
+    offset = 0.0
+    start = time.perf_counter()
+    now = start
+    for offset, item in plan:
+        delay = start + offset - time.perf_counter()
+        await asyncio.sleep(max(0.0, delay))
+        now = time.perf_counter()
+        calibration.drift.record(max(0.0, now - start - offset))
+        task = asyncio.ensure_future(fire(item))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        dispatched += 1
+    monitor.mark_sent()
+    calibration.dispatched = dispatched
+    calibration.dispatch_span = now - start
+    calibration.planned_span = offset
+    await asyncio.gather(*pending)
+    await monitor.stop()
+
+
+async def run_load_detailed(
+    url, rps, duration, method, timeout, headers, body, verify_ssl
+) -> LoadResult:
+    result = LoadResult()
+    result.calibration.target_rps = rps
+    plan = ((i / rps, None) for i in range(rps * duration))
+    async with make_client(timeout, verify_ssl) as client:
+        await run_schedule(
+            plan,
+            lambda _: send_one(client, method, url, headers, body, result),
+            result.calibration,
+        )
+    return result
+
+
+def _worker(args) -> LoadResult:
+    return asyncio.run(run_load_detailed(*args))
+
+
+def run_workers(
+    url, rps, duration, method, timeout, headers, body, verify_ssl, workers: int
+) -> LoadResult:
+    """Splits `rps` across `workers` processes, each with its own event loop."""
+    shares = [rps // workers + (1 if i < rps % workers else 0) for i in range(workers)]
+    jobs = [
+        (url, share, duration, method, timeout, headers, body, verify_ssl)
+        for share in shares
+        if share
+    ]
+    with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+        return LoadResult.merge(list(pool.map(_worker, jobs)))
+
+
+async def run_load(url, rps, duration, method, timeout, headers, body, verify_ssl):
+    result = await run_load_detailed(
+        url, rps, duration, method, timeout, headers, body, verify_ssl
+    )
+    return result.latencies, result.codes, result.errors
+
+
+def to_json(result: LoadResult) -> Dict[str, object]:
+    def stats(h: Histogram) -> Dict[str, float]:
+        return {
+            "count": h.count,
+            "mean": h.mean,
+            "p50": h.percentile(50),
+            "p95": h.percentile(95),
+            "p99": h.percentile(99),
+            "max": h.max,
+        }
+
+    calibration = result.calibration.to_json()
+    payload = {
+        "requests": len(result.codes) + result.errors,
+        "success": sum(1 for c in result.codes if 200 <= c < 400),
+        "errors": result.errors,
+        "throughput": result.throughput,
+        "latency": stats(Histogram(result.latencies)),
+        "phases": {name: stats(result.phases[name]) for name in PHASES},
+        "connection_reuse_ratio": result.reuse_ratio,
+        "calibration": calibration,
+        "valid": calibration["valid"],
+    }
+    if result.paths:
+        payload["paths"] = {
+            path: dict(stats(h), errors=result.path_errors.get(path, 0))
+            for path, h in sorted(result.paths.items())
+        }
+    return payload
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import math
+from typing import Iterable, List, Optional
+
+
+class Histogram:
+    def __init__(self, values: Optional[Iterable[float]] = None):
+        self._values: List[float] = list(values or [])
+        self._sorted = False
+
+    def record(self, value: float) -> None:
+        self._values.append(value)
+        self._sorted = False
+
+    @property
+    def values(self) -> List[float]:
+        if not self._sorted:
+            self._values.sort()
+            self._sorted = True
+        return self._values
+
+    @property
+    def count(self) -> int:
+        return len(self._values)
+
+    @property
+    def mean(self) -> float:
+        return sum(self._values) / len(self._values) if self._values else 0.0
+
+    @property
+    def max(self) -> float:
+        return self.values[-1] if self._values else 0.0
+
+    def percentile(self, p: float) -> float:
+        vals = self.values
+        if not vals:
+            return 0.0
+        rank = max(1, math.ceil(len(vals) * p / 100))
+        return vals[min(rank, len(vals)) - 1]
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import gzip
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .engine import LoadResult, make_client, run_schedule, send_one
+from .metrics import Histogram
+
+# nginx "combined" (y Apache combined): ip - user [time] "request" status bytes "ref" "ua"
+COMBINED_RE = re.compile(
+    r'^(?P<addr>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] '
+    r'"(?P<method>[A-Z]+) (?P<target>\S+)(?: [^"]*)?" (?P<status>\d{3}) '
+)
+TIME_FORMAT = "%d/%b/%Y:%H:%M:%S %z"
+SAFE_METHODS = {"GET", "HEAD"}
+
+
+@dataclass
+class LogEntry:
+    ts: float
+    method: str
+    target: str
+    status: int
+
+
+def _open(path: Path):
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    if magic == b"\x1f\x8b":
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "rt", encoding="utf-8", errors="replace")
+
+
+def iter_log(path: Path, methods: Optional[set] = None) -> Iterator[LogEntry]:
+    """Streams entries from a (optionally gzip-compressed) combined-format log."""
+    with _open(path) as f:
+        for line in f:
+            m = COMBINED_RE.match(line)
+            if not m:
+                continue
+            method = m.group("method")
+            if methods is not None and method not in methods:
+                continue
+            try:
+                ts = datetime.strptime(m.group("time"), TIME_FORMAT).timestamp()
+            except ValueError:
+                continue
+            yield LogEntry(ts, method, m.group("target"), int(m.group("status")))
+
+
+def plan_from_log(
+    entries: Iterable[LogEntry],
+    speed: float = 1.0,
+    rps: Optional[float] = None,
+    limit: Optional[int] = None,
+) -> Iterator[Tuple[float, LogEntry]]:
+    """Original inter-arrival timing divided by `speed`, or a fixed `rps`."""
+    first = None
+    for i, entry in enumerate(entries):
+        if limit is not None and i >= limit:
+            return
+        if rps:
+            yield i / rps, entry
+            continue
+        if first is None:
+            first = entry.ts
+        # Logs can be slightly out of order; never schedule before the start.
+        yield max(0.0, entry.ts - first) / speed, entry
+
+
+def origin_form(target: str) -> Optional[str]:
+    """The `/path?query` of a logged request target, or None if it has none (e.g. `*`).
+
+    Origin-form targets are kept verbatim: parsing them as URLs would read
+    `//host` as a network location or `/a:b` as a scheme.
+    """
+    if target.startswith("/"):
+        return target.split("#", 1)[0]
+    if target.startswith(("http://", "https://")):  # absolute-form (proxy logs)
+        parts = urlsplit(target)
+        return (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    return None
+
+
+def path_key(target: str) -> str:
+    return (origin_form(target) or "/").split("?", 1)[0] or "/"
+
+
+async def run_replay(
+    base_url: str,
+    plan: Iterable[Tuple[float, LogEntry]],
+    timeout: float,
+    headers,
+    verify_ssl: bool,
+    rps: Optional[float] = None,
+) -> LoadResult:
+    result = LoadResult()
+    base = base_url.rstrip("/")
+
+    async def fire(entry: LogEntry):
+        key = path_key(entry.target)
+        target = origin_form(entry.target)
+        if target is None:
+            result.errors += 1
+            result.path_errors[key] = result.path_errors.get(key, 0) + 1
+            return
+        latency = await send_one(client, entry.method, base + target, headers, None, result)
+        if latency is None:
+            result.path_errors[key] = result.path_errors.get(key, 0) + 1
+        else:
+            result.paths.setdefault(key, Histogram()).record(latency)
+
+    async with make_client(timeout, verify_ssl) as client:
+        await run_schedule(plan, fire, result.calibration)
+
+    cal = result.calibration
+    if rps:
+        cal.target_rps = rps
+    elif cal.planned_span > 0:
+        cal.target_rps = (cal.dispatched - 1) / cal.planned_span
+    return result
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import httpx
+
+from .calibration import Calibration
+from .engine import run_schedule
+from .metrics import Histogram
+
+
+@dataclass
+class StreamResult:
+    mode: str
+    opened: int = 0
+    failed: int = 0
+    dropped: int = 0
+    sent: int = 0
+    received: int = 0
+    elapsed: float = 0.0
+    connect: Histogram = field(default_factory=Histogram)
+    rtt: Histogram = field(default_factory=Histogram)
+    first_event: Histogram = field(default_factory=Histogram)
+    calibration: Calibration = field(default_factory=Calibration)
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.received / self.elapsed if self.elapsed else 0.0
+
+
+async def run_websocket(
+    url: str,
+    connections: int,
+    duration: float,
+    msg_rate: float,
+    message: str,
+    timeout: float,
+    headers: Dict[str, str],
+    verify_ssl: bool,
+) -> StreamResult:
+    """Holds `connections` WebSockets open and sends `msg_rate` msgs/s on each.
+
+    Every payload is unique, so an echoing server yields round-trip times.
+    """
+    try:
+        import aiohttp
+    except ImportError as e:  # pragma: no cover
+        raise RuntimeError("WebSocket mode needs aiohttp (pip install aiohttp)") from e
+
+    result = StreamResult("websocket")
+    pending: Dict[str, float] = {}
+    closing = False
+
+    async def open_one(session):
+        t0 = time.perf_counter()
+        try:
+            ws = await session.ws_connect(url, headers=headers)
+        except Exception:
+            result.failed += 1
+            return None
+        result.connect.record(time.perf_counter() - t0)
+        result.opened += 1
+        return ws
+
+    async def read(ws):
+        async for msg in ws:
+            if msg.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                break
+            result.received += 1
+            data = msg.data if isinstance(msg.data, str) else msg.data.decode("utf-8", "replace")
+            sent_at = pending.pop(data, None)
+            if sent_at is not None:
+                result.rtt.record(time.perf_counter() - sent_at)
+        if not closing:
+            result.dropped += 1
+
+    # Sin límite de conexiones: cada WebSocket ocupa una del pool durante toda la prueba.
+    connector = aiohttp.TCPConnector(limit=0, ssl=True if verify_ssl else False)
+    client_timeout = aiohttp.ClientTimeout(total=None, connect=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        opened = [ws for ws in await asyncio.gather(*(open_one(session) for _ in range(connections))) if ws]
+        readers = [asyncio.ensure_future(read(ws)) for ws in opened]
+
+        async def send(item):
+            idx, seq = item
+            ws = opened[idx]
+            if ws.closed:
+                return
+            payload = f"{message}#{idx}:{seq}"
+            pending[payload] = time.perf_counter()
+            try:
+                await ws.send_str(payload)
+                result.sent += 1
+            except Exception:
+                pending.pop(payload, None)
+
+        start = time.perf_counter()
+        if opened and msg_rate > 0:
+            rate = msg_rate * len(opened)
+            result.calibration.target_rps = rate
+            plan = (
+                (i / rate, (i % len(opened), i // len(opened)))
+                for i in range(int(rate * duration))
+            )
+            await run_schedule(plan, send, result.calibration)
+        else:
+            await asyncio.sleep(duration)
+        # Si el servidor hace eco, deja llegar los pendientes antes de cerrar.
+        deadline = time.perf_counter() + timeout
+        while pending and result.rtt.count and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        result.elapsed = time.perf_counter() - start
+        closing = True
+        await asyncio.gather(*(ws.close() for ws in opened), return_exceptions=True)
+        await asyncio.gather(*readers, return_exceptions=True)
+    return result
+
+
+async def run_sse(
+    url: str,
+    connections: int,
+    duration: float,
+    timeout: float,
+    headers: Dict[str, str],
+    verify_ssl: bool,
+) -> StreamResult:
+    """Holds `connections` Server-Sent-Events streams open for `duration` seconds."""
+    result = StreamResult("sse")
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    hdrs = {"Accept": "text/event-stream", **(headers or {})}
+
+    async def hold(client):
+        t0 = time.perf_counter()
+        try:
+            request = client.build_request("GET", url, headers=hdrs)
+            response = await client.send(request, stream=True)
+        except Exception:
+            result.failed += 1
+            return
+        try:
+            if response.status_code >= 400:
+                result.failed += 1
+                return
+            result.connect.record(time.perf_counter() - t0)
+            result.opened += 1
+            first: Optional[float] = None
+            has_data = False
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    has_data = True
+                elif line == "" and has_data:
+                    has_data = False
+                    result.received += 1
+                    if first is None:
+                        first = time.perf_counter() - t0
+                        result.first_event.record(first)
+            result.dropped += 1  # el servidor cerró antes de tiempo
+        except Exception:
+            result.dropped += 1
+        finally:
+            await response.aclose()
+
+    async with httpx.AsyncClient(
+        timeout=httpx.Timeout(timeout, read=None), verify=verify_ssl, limits=limits
+    ) as client:
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(hold(client)) for _ in range(connections)]
+        done, running = await asyncio.wait(tasks, timeout=duration)
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        result.elapsed = time.perf_counter() - start
+    return result
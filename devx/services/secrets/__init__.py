@@ -1 +1 @@
-__all__ = ["cli", "rules"]
+__all__ = ["archives", "baseline", "cli", "engine", "entropy", "gitscan", "rules", "scanner"]
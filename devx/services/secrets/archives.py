@@ -0,0 +1,103 @@
+import tarfile
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Iterator, List, Optional, Tuple
+
+from .engine import Engine, Finding
+from .scanner import SNIFF_BYTES, is_binary
+
+ARCHIVE_SUFFIXES = (".zip", ".whl", ".tar", ".tar.gz", ".tgz")
+MEMBER_BYTES = 10 * 1024 * 1024
+TOTAL_BYTES = 200 * 1024 * 1024
+_READ_BYTES = 1024 * 1024
+
+
+def is_archive(path: Path) -> bool:
+    return path.name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+@dataclass
+class ArchiveScan:
+    """Findings of one archive, keyed by member name, plus what was read or left out."""
+
+    findings: List[Tuple[str, Finding]] = field(default_factory=list)
+    members: int = 0
+    scanned: int = 0
+    skipped: int = 0
+    truncated: bool = False
+
+
+def _read_capped(fh: IO[bytes], cap: int) -> Optional[bytes]:
+    """Reads at most `cap` bytes; None if there is more (the declared size may lie)."""
+    chunks, left = [], cap + 1
+    while left:
+        chunk = fh.read(min(left, _READ_BYTES))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        left -= len(chunk)
+    data = b"".join(chunks)
+    return None if len(data) > cap else data
+
+
+def _zip_members(path: Path) -> Iterator[Tuple[str, int, IO[bytes]]]:
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            with zf.open(info) as fh:
+                yield info.filename, info.file_size, fh
+
+
+def _tar_members(path: Path) -> Iterator[Tuple[str, int, IO[bytes]]]:
+    # "r|*" reads the (possibly compressed) stream once, front to back, without seeking.
+    with tarfile.open(path, "r|*") as tf:
+        for member in tf:
+            if not member.isfile():
+                continue
+            fh = tf.extractfile(member)
+            if fh is not None:
+                yield member.name, member.size, fh
+
+
+def iter_members(path: Path) -> Iterator[Tuple[str, int, IO[bytes]]]:
+    """`(name, declared_size, stream)` for each regular file of a zip/wheel or tar archive.
+
+    Members are decompressed on the fly; nothing is written to disk.
+    """
+    return _zip_members(path) if zipfile.is_zipfile(path) else _tar_members(path)
+
+
+def scan_archive(
+    engine: Engine,
+    path: Path,
+    member_bytes: int = MEMBER_BYTES,
+    total_bytes: int = TOTAL_BYTES,
+    skip=None,
+) -> ArchiveScan:
+    """Scans the members of an archive with `engine`, one member in memory at a time.
+
+    Members larger than `member_bytes`, binary, or whose name matches the
+    `skip` predicate are skipped; scanning stops once `total_bytes` of
+    uncompressed data have been read. Nested archives are not opened.
+    """
+    result = ArchiveScan()
+    for name, size, fh in iter_members(path):
+        if (skip and skip(name)) or size > member_bytes:
+            result.skipped += 1
+            continue
+        if result.scanned + size > total_bytes:
+            result.truncated = True
+            break
+        data = _read_capped(fh, min(member_bytes, total_bytes - result.scanned))
+        if data is None:
+            result.skipped += 1
+            continue
+        result.scanned += len(data)
+        if is_binary(data[:SNIFF_BYTES]):
+            result.skipped += 1
+            continue
+        result.members += 1
+        result.findings.extend((name, f) for f in engine.scan(data))
+    return result
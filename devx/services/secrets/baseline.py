@@ -0,0 +1,87 @@
+import fnmatch
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+BASELINE_VERSION = 1
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_match(match: str) -> str:
+    """Whitespace-insensitive form of a match, so reformatting keeps the fingerprint."""
+    return _SPACES.sub(" ", match.strip())
+
+
+def fingerprint(rule: str, path: str, match: str) -> str:
+    """Stable id of a finding: rule, POSIX path and a hash of the normalized match.
+
+    The line number is left out on purpose so findings survive edits above them.
+    """
+    key = "\0".join((rule, Path(path).as_posix(), normalize_match(match)))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+class Allowlist:
+    """Path globs and rule names compiled once into a single regex over `rule\\0path`."""
+
+    def __init__(self, paths: Iterable[str] = (), rules: Iterable[str] = ()):
+        self.paths = list(paths)
+        self.rules = list(rules)
+        parts = []
+        if self.rules:
+            parts.append("(?:" + "|".join(map(re.escape, self.rules)) + r")\x00.*")
+        if self.paths:
+            globs = "|".join(fnmatch.translate(p).replace(r"\Z", "") for p in self.paths)
+            parts.append(r"[^\x00]*\x00(?:" + globs + ")")
+        self._matcher = re.compile(r"(?s:" + "|".join(parts) + r")\Z") if parts else None
+
+    def __bool__(self) -> bool:
+        return self._matcher is not None
+
+    def allows(self, rule: str, path: str) -> bool:
+        return self._matcher is not None and self._matcher.match(f"{rule}\0{Path(path).as_posix()}") is not None
+
+
+class Baseline:
+    """Accepted findings (by fingerprint) plus an allowlist, stored as JSON."""
+
+    def __init__(self, fingerprints: Optional[Set[str]] = None, allowlist: Optional[Allowlist] = None):
+        self.fingerprints = fingerprints or set()
+        self.allowlist = allowlist or Allowlist()
+
+    def suppresses(self, rule: str, path: str, match: str) -> bool:
+        return self.allowlist.allows(rule, path) or fingerprint(rule, path, match) in self.fingerprints
+
+
+def load_baseline(path: Path) -> Baseline:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("version") != BASELINE_VERSION:
+        raise ValueError(f"{path} is not a secrets baseline (use --update-baseline to create one)")
+    allow = data.get("allowlist", {})
+    return Baseline(
+        {entry["fingerprint"] for entry in data.get("findings", [])},
+        Allowlist(allow.get("paths", []), allow.get("rules", [])),
+    )
+
+
+def write_baseline(path: Path, findings: List[Tuple[str, str, int, str]], allowlist: Optional[Allowlist] = None) -> int:
+    """Writes every `(rule, path, line, match)` as accepted; returns how many were written.
+
+    The file is replaced atomically, and the allowlist is kept.
+    """
+    entries: Dict[str, Dict[str, object]] = {}
+    for rule, file, line, match in findings:
+        fp = fingerprint(rule, file, match)
+        entries.setdefault(fp, {"fingerprint": fp, "rule": rule, "path": Path(file).as_posix(), "line": line})
+    payload = {
+        "version": BASELINE_VERSION,
+        "allowlist": {"paths": allowlist.paths, "rules": allowlist.rules} if allowlist else {"paths": [], "rules": []},
+        "findings": sorted(entries.values(), key=lambda e: (e["path"], e["line"], e["rule"])),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    tmp.replace(path)
+    return len(entries)
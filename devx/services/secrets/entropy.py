@@ -0,0 +1,76 @@
+import math
+import re
+from collections import Counter
+from typing import List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python fallback below
+    np = None
+
+HEX_CHARS = frozenset(b"0123456789abcdefABCDEF")
+BATCH_TOKENS = 4096
+# A token of n bytes has at most log2(n) bits/byte: short tokens are held to
+# log2(n) minus this margin when that is below the configured threshold.
+LENGTH_MARGIN = 0.5
+
+
+def _entropy(token: bytes) -> float:
+    n = len(token)
+    return -sum(c / n * math.log2(c / n) for c in Counter(token).values())
+
+
+def _entropy_numpy(tokens: List[bytes]) -> List[float]:
+    lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+    flat = np.frombuffer(b"".join(tokens), dtype=np.uint8).astype(np.int64)
+    owner = np.repeat(np.arange(len(tokens), dtype=np.int64), lengths)
+    counts = np.bincount(owner * 256 + flat, minlength=len(tokens) * 256).reshape(len(tokens), 256)
+    p = counts / lengths[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(counts > 0, p * np.log2(p), 0.0)
+    return (-terms.sum(axis=1)).tolist()
+
+
+def shannon_entropy(tokens: List[bytes]) -> List[float]:
+    """Shannon entropy (bits per byte) of each token.
+
+    With NumPy, tokens are processed in batches as one byte array (a
+    per-token byte histogram via `bincount`); otherwise one `Counter` per token.
+    """
+    if np is None:
+        return [_entropy(t) for t in tokens]
+    out: List[float] = []
+    for i in range(0, len(tokens), BATCH_TOKENS):
+        out.extend(_entropy_numpy(tokens[i : i + BATCH_TOKENS]))
+    return out
+
+
+class EntropyDetector:
+    """Flags quoted string literals made of base64/hex characters whose
+    entropy is above the threshold for their character set (see `threshold`).
+    """
+
+    name = "High entropy string"
+
+    def __init__(self, base64_threshold: float = 4.5, hex_threshold: float = 3.0, min_length: int = 20):
+        self.base64_threshold = base64_threshold
+        self.hex_threshold = hex_threshold
+        self.min_length = min_length
+        self._candidate = re.compile(rb"""(["'`])([A-Za-z0-9+/=_\-]{%d,})\1""" % min_length)
+
+    def threshold(self, token: bytes) -> float:
+        """Threshold for `token`, capped for tokens too short to ever reach it."""
+        base = self.hex_threshold if HEX_CHARS.issuperset(token) else self.base64_threshold
+        return min(base, math.log2(len(token)) - LENGTH_MARGIN)
+
+    def find(self, data: bytes, limit: int) -> List[Tuple[int, bytes]]:
+        """`(offset, token)` of high-entropy literals starting before `limit`."""
+        spans = [(m.start(2), m.group(2)) for m in self._candidate.finditer(data) if m.start(2) < limit]
+        if not spans:
+            return []
+        scores = shannon_entropy([token for _, token in spans])
+        found = []
+        for (start, token), score in zip(spans, scores):
+            if score > self.threshold(token):
+                found.append((start, token))
+        return found
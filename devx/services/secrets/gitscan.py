@@ -0,0 +1,247 @@
+import codecs
+import re
+import subprocess
+import tempfile
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import IO, Iterator, List, Optional, Tuple
+
+from .engine import Engine, Finding
+from .scanner import SNIFF_BYTES, is_binary, scan_stream
+
+NULL_SHA = "0" * 40
+HUNK_RE = re.compile(rb"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+_READ_BYTES = 1024 * 1024
+
+
+class GitError(RuntimeError):
+    pass
+
+
+@dataclass
+class ScanStats:
+    """Blobs or hunks scanned, and their size in bytes."""
+
+    items: int = 0
+    scanned: int = 0
+
+
+@dataclass(frozen=True)
+class HistoryFinding:
+    finding: Finding
+    commit: str
+    path: str
+    blob: str
+
+
+def _git(repo: Path, *args: str, stdin=None) -> Tuple[subprocess.Popen, IO[bytes]]:
+    """A git process streaming its stdout, and the temporary file its stderr
+    goes to (an unread pipe could fill up and block git)."""
+    err = tempfile.TemporaryFile()
+    proc = subprocess.Popen(
+        ["git", "-c", "core.quotePath=false", *args],
+        cwd=str(repo),
+        stdin=stdin,
+        stdout=subprocess.PIPE,
+        stderr=err,
+    )
+    return proc, err
+
+
+def _close(proc: subprocess.Popen, err: IO[bytes], what: str, check: bool = True) -> None:
+    """Closes the output of `proc` and waits for it.
+
+    With `check` a non-zero exit raises `GitError`; without, git is killed
+    first (the reader stopped early and is already unwinding).
+    """
+    proc.stdout.close()
+    if not check:
+        proc.kill()
+    code = proc.wait()
+    err.seek(0)
+    message = err.read().decode("utf-8", "replace").strip()
+    err.close()
+    if check and code != 0:
+        raise GitError(message or f"{what} failed")
+
+
+def _unquote(path: str) -> str:
+    """Undoes git's C-style quoting of unusual paths."""
+    if len(path) > 1 and path[0] == path[-1] == '"':
+        return codecs.escape_decode(path[1:-1].encode("utf-8"))[0].decode("utf-8", "replace")
+    return path
+
+
+def iter_introduced_blobs(repo: Path) -> Iterator[Tuple[str, str, str]]:
+    """`(blob, commit, path)` for every reachable blob, once, at the first
+    commit (oldest first) whose diff adds it.
+
+    One `git log --raw` process is streamed; merges are diffed against each
+    parent (`-m`) so blobs first appearing in a merge are not missed, and
+    root commits always show their diff (`--root`, whatever `log.showRoot` says).
+    """
+    proc, err = _git(
+        repo, "log", "--all", "--reverse", "--topo-order", "-m", "--root", "--raw", "--no-abbrev",
+        "--no-renames", "--format=commit %H",
+    )
+    seen = set()
+    commit = ""
+    try:
+        for raw in proc.stdout:
+            line = raw.decode("utf-8", "replace").rstrip("\n")
+            if line.startswith("commit "):
+                commit = line[7:].split(" ", 1)[0]
+                continue
+            if not line.startswith(":"):
+                continue
+            meta, _, path = line.partition("\t")
+            fields = meta.split(" ")
+            mode, blob = fields[1], fields[3]
+            if blob == NULL_SHA or mode.startswith("160"):
+                continue
+            key = bytes.fromhex(blob)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield blob, commit, _unquote(path)
+    except BaseException:
+        _close(proc, err, "git log", check=False)
+        raise
+    _close(proc, err, "git log")
+
+
+class _BlobStream:
+    """The next `size` bytes of `git cat-file --batch` output, as a file."""
+
+    def __init__(self, fh: IO[bytes], size: int):
+        self._fh = fh
+        self.left = size
+
+    def read(self, n: int) -> bytes:
+        data = self._fh.read(min(n, self.left))
+        if len(data) < min(n, self.left):
+            raise GitError("git cat-file closed its output")
+        self.left -= len(data)
+        return data
+
+    def skip(self) -> None:
+        while self.left:
+            self.read(_READ_BYTES)
+
+
+class BlobReader:
+    """One `git cat-file --batch` process answering blob requests in turn."""
+
+    def __init__(self, repo: Path):
+        self._proc, self._err = _git(repo, "cat-file", "--batch", stdin=subprocess.PIPE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self) -> None:
+        self._proc.stdin.close()
+        _close(self._proc, self._err, "git cat-file", check=False)
+
+    def scan(self, blob: str, engine: Engine, max_size: Optional[int] = None) -> Optional[Tuple[List[Finding], int]]:
+        """Findings of a blob and its size, or None when it is missing, binary
+        or larger than `max_size`.
+
+        The blob is scanned in chunks as it is read (`scan_stream`), so memory
+        use does not depend on its size.
+        """
+        self._proc.stdin.write(blob.encode("ascii") + b"\n")
+        self._proc.stdin.flush()
+        header = self._proc.stdout.readline().decode("ascii", "replace").split()
+        if len(header) != 3:
+            return None
+        size = int(header[2])
+        stream = _BlobStream(self._proc.stdout, size + 1)  # content and its trailing newline
+        found = None if max_size and size > max_size else scan_stream(engine, stream, size)
+        stream.skip()
+        return None if found is None else (found, size)
+
+
+def scan_history(
+    repo: Path, engine: Engine, max_size: Optional[int] = None, stats: Optional[ScanStats] = None
+) -> Iterator[HistoryFinding]:
+    """Findings of every unique blob in the history, scanned once, mapped to
+    the commit and path that introduced the blob; yielded as they are found.
+
+    Blobs and bytes scanned are accumulated in `stats` when given.
+    """
+    with BlobReader(repo) as reader:
+        for blob, commit, path in iter_introduced_blobs(repo):
+            result = reader.scan(blob, engine, max_size)
+            if result is None:
+                continue
+            found, size = result
+            if stats is not None:
+                stats.items += 1
+                stats.scanned += size
+            for f in found:
+                yield HistoryFinding(f, commit, path, blob)
+
+
+def iter_staged_hunks(repo: Path) -> Iterator[Tuple[str, int, bytes]]:
+    """`(path, first_line, added_lines)` for each hunk of `git diff --cached -U0`.
+
+    Only added lines are kept; consecutive added lines of a hunk are
+    consecutive in the staged file, so line numbers map back exactly.
+    """
+    proc, err = _git(
+        repo, "diff", "--cached", "-U0", "--no-color", "--no-ext-diff", "--no-renames",
+        "--src-prefix=a/", "--dst-prefix=b/",
+    )
+    path: Optional[str] = None
+    start, lines, header = 0, [], False
+
+    def flush():
+        if path is not None and lines:
+            return path, start, b"".join(lines)
+        return None
+
+    try:
+        for raw in proc.stdout:
+            if raw.startswith(b"diff --git"):
+                hunk = flush()
+                if hunk:
+                    yield hunk
+                path, lines, header = None, [], True
+            elif header and raw.startswith(b"+++ "):
+                # Git ends the header with a tab when the path has a space (quoted paths never end in one).
+                name = _unquote(raw[4:].rstrip(b"\n").removesuffix(b"\t").decode("utf-8", "replace"))
+                path = name[2:] if name.startswith("b/") else None
+            elif raw.startswith(b"@@"):
+                hunk = flush()
+                if hunk:
+                    yield hunk
+                m = HUNK_RE.match(raw)
+                start, lines, header = (int(m.group(1)) if m else 0), [], False
+            elif not header and raw.startswith(b"+"):
+                lines.append(raw[1:])
+        hunk = flush()
+        if hunk:
+            yield hunk
+    except BaseException:
+        _close(proc, err, "git diff", check=False)
+        raise
+    _close(proc, err, "git diff")
+
+
+def scan_staged(repo: Path, engine: Engine, stats: Optional[ScanStats] = None) -> Iterator[Tuple[str, Finding]]:
+    """Findings in the lines added by the staged changes, with their line in the staged file.
+
+    Hunks and bytes scanned are accumulated in `stats` when given.
+    """
+    for path, start, data in iter_staged_hunks(repo):
+        if is_binary(data[:SNIFF_BYTES]):
+            continue
+        if stats is not None:
+            stats.items += 1
+            stats.scanned += len(data)
+        for f in engine.scan(data):
+            yield path, replace(f, line=start + f.line - 1)
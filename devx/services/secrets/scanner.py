@@ -0,0 +1,91 @@
+import mmap
+from dataclasses import replace
+from pathlib import Path
+from typing import IO, List, Optional
+
+from .engine import Engine, Finding
+
+SNIFF_BYTES = 8192
+CHUNK_BYTES = 16 * 1024 * 1024
+OVERLAP_BYTES = 64 * 1024
+
+
+def is_binary(head: bytes) -> bool:
+    return b"\0" in head
+
+
+def _scan_windows(engine: Engine, windows) -> List[Finding]:
+    findings: List[Finding] = []
+    line = 0
+    for start, data, limit in windows:
+        for f in engine.scan(data, limit):
+            findings.append(replace(f, line=f.line + line, start=f.start + start))
+        line += data.count(b"\n", 0, limit)
+    return findings
+
+
+def scan_buffer(
+    engine: Engine, buf, size: int, chunk: int = CHUNK_BYTES, overlap: int = OVERLAP_BYTES
+) -> List[Finding]:
+    """Scans `buf` (bytes or mmap) in chunks of `chunk` bytes.
+
+    Each chunk is extended by `overlap` bytes so that a match starting near
+    its end is seen whole; matches are only kept by the chunk they start in.
+    Offsets and line numbers are relative to the whole buffer.
+    """
+    windows = (
+        (start, buf[start : min(size, start + chunk + overlap)], min(chunk, size - start))
+        for start in range(0, size, chunk)
+    )
+    return _scan_windows(engine, windows)
+
+
+def scan_stream(
+    engine: Engine, fh: IO[bytes], size: int, chunk: int = CHUNK_BYTES, overlap: int = OVERLAP_BYTES
+) -> Optional[List[Finding]]:
+    """Like `scan_buffer`, for `size` bytes read front to back from `fh`;
+    None if they look binary. Only one chunk plus its overlap is held in memory.
+    """
+    if not size:
+        return []
+    head = fh.read(min(size, chunk + overlap))
+    if is_binary(head[:SNIFF_BYTES]):
+        return None
+
+    def windows():
+        data, end = head, len(head)
+        for start in range(0, size, chunk):
+            if start:
+                more = min(size, start + chunk + overlap) - end
+                data = data[chunk:] + fh.read(more)
+                end += more
+            yield start, data, min(chunk, size - start)
+
+    return _scan_windows(engine, windows())
+
+
+def scan_file(
+    engine: Engine,
+    path: Path,
+    max_size: Optional[int] = None,
+    chunk: int = CHUNK_BYTES,
+    overlap: int = OVERLAP_BYTES,
+) -> Optional[List[Finding]]:
+    """Findings in a file, or None if it was skipped (binary or larger than `max_size`).
+
+    The file is memory-mapped and scanned as bytes, chunk by chunk, so
+    memory use does not depend on its size.
+    """
+    size = path.stat().st_size
+    if max_size and size > max_size:
+        return None
+    if size == 0:
+        return []
+    with open(path, "rb") as fh:
+        if is_binary(fh.read(SNIFF_BYTES)):
+            return None
+        if size <= chunk:
+            fh.seek(0)
+            return engine.scan(fh.read())
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return scan_buffer(engine, mm, size, chunk, overlap)
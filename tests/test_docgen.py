@@ -19,3 +19,175 @@ def test_extract_docs_from_module(tmp_path):
     assert "Func foo docs." in md
     assert "Clase Bar docs." in md
     assert "Metodo baz docs." in md
+
+
+def _write_package(root, n):
+    pkg = root / "pkg"
+    pkg.mkdir()
+    for i in range(n):
+        (pkg / f"m{i:02d}.py").write_text(f'"""Module {i}."""\ndef f{i}():\n    """Doc {i}."""\n', encoding="utf-8")
+    (pkg / "broken.py").write_text("def oops(:\n", encoding="utf-8")
+    return pkg
+
+
+def test_build_is_sorted_cached_and_reports_failures(tmp_path):
+    from devx.services.docgen.builder import build
+
+    root = tmp_path / "src"
+    root.mkdir()
+    pkg = _write_package(root, 3)
+    cache = tmp_path / "cache.sqlite"
+
+    first = build(root, cache, jobs=1)
+    assert [m.path for m in first.modules] == ["pkg/broken.py", "pkg/m00.py", "pkg/m01.py", "pkg/m02.py"]
+    assert [m.path for m in first.failures] == ["pkg/broken.py"]
+    assert first.failures[0].error.startswith("SyntaxError")
+    assert (first.extracted, first.cached) == (4, 0)
+
+    (pkg / "m01.py").write_text('"""Changed."""\n', encoding="utf-8")
+    (pkg / "m02.py").unlink()
+    second = build(root, cache, jobs=1)
+    assert (second.extracted, second.cached) == (1, 2)
+    assert "Changed." in second.modules[2].markdown
+    assert second.failures[0].path == "pkg/broken.py"
+
+
+def test_build_process_pool_matches_serial(tmp_path, monkeypatch):
+    from devx.services.docgen import builder
+
+    _write_package(tmp_path, 6)
+    monkeypatch.setattr(builder, "POOL_MIN_MODULES", 2)
+    parallel = builder.build(tmp_path, jobs=2)
+    serial = builder.build(tmp_path, jobs=1)
+    assert parallel.modules == serial.modules
+
+
+def test_write_pages_per_package_skips_unchanged(tmp_path):
+    import os
+    from devx.services.docgen.builder import iter_build
+    from devx.services.docgen.pages import write_pages
+
+    root = tmp_path / "proj"
+    (root / "pkg" / "sub").mkdir(parents=True)
+    (root / "setup.py").write_text('"""Setup."""\n', encoding="utf-8")
+    (root / "pkg" / "a.py").write_text('"""A."""\n', encoding="utf-8")
+    (root / "pkg" / "z.py").write_text('"""Z."""\n', encoding="utf-8")
+    (root / "pkg" / "sub" / "b.py").write_text('"""B."""\n', encoding="utf-8")
+    out = tmp_path / "site"
+
+    stats = write_pages(iter_build(root, jobs=1), out, "proj")
+    assert [name for _, name, _ in stats.pages] == ["proj.md", "proj.pkg.md", "proj.pkg.sub.md"]
+    assert (stats.written, stats.unchanged) == (4, 0)
+    page = (out / "proj.pkg.md").read_text(encoding="utf-8")
+    assert page.startswith("# Package `proj.pkg`") and page.index("A.") < page.index("Z.")
+    assert "- [proj.pkg.sub](proj.pkg.sub.md) — 1 module" in (out / "index.md").read_text(encoding="utf-8")
+
+    for page in out.iterdir():
+        os.utime(page, (1, 1))
+    (root / "pkg" / "z.py").write_text('"""Z changed."""\n', encoding="utf-8")
+    stats = write_pages(iter_build(root, jobs=1), out, "proj")
+    assert (stats.written, stats.unchanged) == (1, 3)
+    assert {p.name for p in out.iterdir() if p.stat().st_mtime != 1} == {"proj.pkg.md"}
+
+    (root / "pkg" / "sub").rename(root / "pkg" / "renamed")
+    (out / "notes.md").write_text("Kept.", encoding="utf-8")
+    (out / "projx.md").write_text("Kept.", encoding="utf-8")
+    stats = write_pages(iter_build(root, jobs=1), out, "proj")
+    assert stats.removed == 1
+    assert sorted(p.name for p in out.iterdir()) == [
+        "index.md", "notes.md", "proj.md", "proj.pkg.md", "proj.pkg.renamed.md", "projx.md"
+    ]
+
+
+def test_symbols_and_incremental_search_index(tmp_path):
+    import ast
+    from devx.services.docgen.builder import build
+    from devx.services.docgen.generator import symbols
+    from devx.services.docgen.index import search, tokenize
+
+    source = (
+        '"""Parsing helpers."""\n'
+        "class UrlParser(Base):\n"
+        '    """Parses URLs."""\n'
+        "    class Options:\n"
+        "        pass\n"
+        "    @staticmethod\n"
+        "    async def parse_url(raw: str, strict=False) -> 'Url':\n"
+        '        """Splits a raw URL into parts."""\n'
+        "        return raw\n"
+    )
+    found = symbols(ast.parse(source), "pkg.parsing")
+    assert [(s.kind, s.qualname, s.line_start, s.line_end) for s in found] == [
+        ("module", "pkg.parsing", 1, 9),
+        ("class", "pkg.parsing.UrlParser", 2, 9),
+        ("class", "pkg.parsing.UrlParser.Options", 4, 5),
+        ("method", "pkg.parsing.UrlParser.parse_url", 6, 9),
+    ]
+    assert found[1].signature == "class UrlParser(Base)"
+    assert found[3].signature == "async def parse_url(raw: str, strict=False) -> 'Url'"
+    assert found[3].decorators == ("@staticmethod",)
+    assert tokenize("parse_url HTTPServer") == ["parse_url", "parse", "url", "httpserver", "http", "server"]
+    assert tokenize("Größe año_2024 x86 ÉtatCivil") == [
+        "größe", "año_2024", "año", "2024", "x86", "étatcivil", "état", "civil"
+    ]
+
+    root = tmp_path / "proj"
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "parsing.py").write_text(source, encoding="utf-8")
+    (root / "pkg" / "other.py").write_text('def url_joiner():\n    """Joins paths."""\n', encoding="utf-8")
+    index = tmp_path / "index.sqlite"
+    build(root, index, jobs=1)
+
+    assert [h.qualname for h in search(index, "parse_url")] == ["pkg.parsing.UrlParser.parse_url"]
+    assert [h.qualname for h in search(index, "url")] == [
+        "pkg.other.url_joiner", "pkg.parsing.UrlParser", "pkg.parsing.UrlParser.parse_url"
+    ]
+    assert [h.qualname for h in search(index, "urlparser")] == ["pkg.parsing.UrlParser"]
+    assert [h.qualname for h in search(index, "raw url parts")] == ["pkg.parsing.UrlParser.parse_url"]
+    assert search(index, "joins")[0].summary == "Joins paths."
+
+    (root / "pkg" / "parsing.py").write_text("def tokenize_url():\n    pass\n", encoding="utf-8")
+    (root / "pkg" / "other.py").unlink()
+    assert build(root, index, jobs=1).extracted == 1
+    assert search(index, "parse_url") == [] and search(index, "joins") == []
+    assert [h.qualname for h in search(index, "tokenize")] == ["pkg.parsing.tokenize_url"]
+
+    import sqlite3
+    from typer.testing import CliRunner
+    from devx.services.docgen.cli import app
+
+    old = tmp_path / "old.sqlite"
+    with sqlite3.connect(str(old)) as db:
+        db.execute("CREATE TABLE modules (path TEXT PRIMARY KEY, hash TEXT, markdown TEXT, error TEXT)")
+        db.execute("PRAGMA user_version = 2")
+    result = CliRunner().invoke(app, ["search", "url", "--cache", str(old)])
+    assert result.exit_code == 1 and not isinstance(result.exception, sqlite3.Error)
+
+
+def test_extract_renders_signatures_without_importing(tmp_path):
+    from devx.services.docgen.builder import benchmark
+
+    f = tmp_path / "sigs.py"
+    f.write_text(
+        "import this_module_does_not_exist\n"
+        "class Repo(Base, metaclass=Meta):\n"
+        "    class Config:\n"
+        "        def load(self, *paths: str, strict=True, **overrides) -> None: ...\n"
+        "    @property\n"
+        "    def size(self) -> int:\n"
+        '        """Size."""\n'
+        "@app.command('x')\n"
+        "async def fetch(url, /, retries: int = 3, *, timeout=None) -> dict[str, int]: ...\n",
+        encoding="utf-8",
+    )
+    md = extract(f)
+    assert "## Repo\n\n```python\nclass Repo(Base, metaclass=Meta)\n```" in md
+    assert "#### Repo.Config\n\n```python\nclass Config\n```" in md
+    assert "###### Repo.Config.load\n\n```python\ndef load(self, *paths: str, strict=True, **overrides) -> None\n```" in md
+    assert "#### size (property)\n\n```python\n@property\ndef size(self) -> int\n```\n\nSize." in md
+    assert "@app.command('x')\nasync def fetch(url, /, retries: int = 3, *, timeout=None) -> dict[str, int]\n" in md
+
+    results = benchmark(tmp_path, repeat=1)
+    assert results["files"] == 1 and results["lines"] == 9 and results["loc_per_s"] > 0
+    f.write_text("x = 1\ny = 2", encoding="utf-8")
+    assert benchmark(tmp_path, repeat=1)["lines"] == 2
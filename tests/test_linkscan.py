@@ -1,10 +1,31 @@
+import asyncio
+import time
 import types
-from devx.services.linkscan.crawler import crawl
+import pytest
+from devx.services.linkscan.crawler import crawl, crawl_async
+from devx.services.linkscan.links import LxmlLinkParser, make_parser, parse_links
+from devx.services.linkscan.ratecontrol import HostGate, HostLimiter, parse_retry_after
+from devx.services.linkscan.robots import parse_robots
+from devx.services.linkscan.simhash import NearDuplicates, SimHash, hamming, url_pattern
+from devx.services.linkscan.sitemaps import SitemapParser
+from devx.services.linkscan.state import SCHEMA_VERSION, CrawlState, Page
+from devx.services.linkscan.targets import TargetChecker
+from devx.services.linkscan.urls import BloomFilter, FingerprintSet, canonicalize, make_visited
 
 class DummyResp:
-    def __init__(self, text="", status_code=200):
+    def __init__(self, text="", status_code=200, headers=None):
         self.text = text
         self.status_code = status_code
+        self.headers = headers or {"content-type": "text/html; charset=utf-8"}
+        self.body_read = False
+
+    def iter_text(self):
+        self.body_read = True
+        for i in range(0, len(self.text), 16):
+            yield self.text[i : i + 16]
+
+    def close(self):
+        pass
 
 class DummyClient:
     def __init__(self, *args, **kwargs):
@@ -26,9 +47,625 @@ class DummyClient:
             return DummyResp("", 500)
         return DummyResp(page, 200)
 
+    def build_request(self, method, url, headers=None):
+        return types.SimpleNamespace(method=method, url=url, headers=headers or {})
+
+    def send(self, request, stream=False):
+        return self.get(request.url)
+
+    def head(self, url):
+        return self.get(url)
+
 def test_crawl_collects_broken(monkeypatch):
     import devx.services.linkscan.crawler as cr
 
     monkeypatch.setattr(cr, "httpx", types.SimpleNamespace(Client=DummyClient))
     broken = crawl("https://site.test", limit=10, timeout=2.0)
     assert any(url.endswith("/broken") and status == 500 for url, status in broken)
+
+SITE = {
+    "https://site.test": '<a href="/a">a</a> <a href="/b">b</a> <a href="https://other.test/x">ext</a>',
+    "https://site.test/a": '<a href="/c">c</a> <a href="/broken">x</a> <a href="/b">b</a>',
+    "https://site.test/b": '<a href="/d">d</a> <a href="/a">a</a> <a href="/e">e</a>',
+    "https://site.test/c": '<a href="/">home</a> <a href="/f">f</a>',
+    "https://site.test/d": "<p>leaf</p>",
+    "https://site.test/e": '<a href="/gone">gone</a>',
+    "https://site.test/f": "<p>leaf</p>",
+}
+
+class SiteClient(DummyClient):
+    def __init__(self, *args, **kwargs):
+        self.pages = dict(SITE)
+
+class AsyncDummyResp(DummyResp):
+    async def aiter_text(self):
+        self.body_read = True
+        for i in range(0, len(self.text), 16):
+            yield self.text[i : i + 16]
+
+    async def aclose(self):
+        pass
+
+class AsyncSiteClient:
+    active = 0
+    peak = 0
+
+    def __init__(self, *args, **kwargs):
+        self.pages = dict(SITE)
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *a):
+        return False
+
+    def build_request(self, method, url, headers=None):
+        return types.SimpleNamespace(method=method, url=url, headers=headers or {})
+
+    async def page(self, method, url, headers):
+        page = self.pages.get(url)
+        if page is None:
+            return AsyncDummyResp("", 500)
+        return AsyncDummyResp(page, 200)
+
+    async def send(self, request, stream=False):
+        cls = type(self)
+        cls.active += 1
+        cls.peak = max(cls.peak, cls.active)
+        await asyncio.sleep(0.01)
+        cls.active -= 1
+        self.calls.append((request.method, request.url))
+        return await self.page(request.method, request.url, request.headers)
+
+    async def get(self, url):
+        return await self.send(self.build_request("GET", url))
+
+    async def head(self, url):
+        return await self.send(self.build_request("HEAD", url))
+
+def test_crawl_async_matches_sequential(monkeypatch):
+    import devx.services.linkscan.crawler as cr
+
+    monkeypatch.setattr(
+        cr,
+        "httpx",
+        types.SimpleNamespace(
+            Client=SiteClient, AsyncClient=AsyncSiteClient, Limits=lambda **kw: None
+        ),
+    )
+    for limit in (1, 3, 5, 8, 100):
+        expected = crawl("https://site.test", limit=limit, timeout=2.0)
+        got = asyncio.run(
+            crawl_async("https://site.test", limit=limit, timeout=2.0, concurrency=4, per_host=2)
+        )
+        assert got == expected
+    assert AsyncSiteClient.peak == 2
+
+def test_host_gate_aimd():
+    async def scenario():
+        gate = HostGate(4, adaptive=True, maximum=8)
+        for _ in range(40):
+            await gate.acquire()
+            await gate.release(200, 0.05)
+        grown = gate.limit
+        await gate.acquire()
+        await gate.release(429, 0.05)
+        return grown, gate.limit, gate.backoffs
+
+    grown, after, backoffs = asyncio.run(scenario())
+    assert grown == 8
+    assert after == 4
+    assert backoffs == 1
+
+def test_host_gate_honours_retry_after_and_crawl_delay():
+    async def scenario():
+        gate = HostGate(4, adaptive=True, crawl_delay=0.05)
+        t0 = time.monotonic()
+        for _ in range(3):
+            await gate.acquire()
+            await gate.release(200, 0.01)
+        spaced = time.monotonic() - t0
+        gate.crawl_delay = 0.0
+        await gate.acquire()
+        await gate.release(503, 0.01, retry_after=0.2)
+        t1 = time.monotonic()
+        await gate.acquire()
+        await gate.release(200, 0.01)
+        return spaced, time.monotonic() - t1
+
+    spaced, waited = asyncio.run(scenario())
+    assert spaced >= 0.1
+    assert waited >= 0.19
+
+def test_parse_robots_and_retry_after():
+    robots = parse_robots(
+        "User-agent: googlebot\nCrawl-delay: 9\n\n"
+        "User-agent: *\nDisallow: /private\nCrawl-delay: 2.5\n"
+        "Sitemap: https://site.test/sitemap.xml\n"
+    )
+    assert robots.crawl_delay == 2.5
+    assert robots.sitemaps == ["https://site.test/sitemap.xml"]
+    assert parse_robots("User-agent: devx\nCrawl-delay: 1\n").crawl_delay == 1.0
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("soon") is None
+
+def test_crawl_async_adaptive_retries_rate_limited(monkeypatch):
+    import devx.services.linkscan.crawler as cr
+
+    class ThrottlingClient(AsyncSiteClient):
+        hits = {}
+
+        async def page(self, method, url, headers):
+            if url.endswith("/robots.txt"):
+                return AsyncDummyResp("User-agent: *\nCrawl-delay: 0.01\n", 200)
+            n = self.hits[url] = self.hits.get(url, 0) + 1
+            if url.endswith("/d") and n == 1:
+                return AsyncDummyResp("", 429, {"Retry-After": "0"})
+            return await super().page(method, url, headers)
+
+    monkeypatch.setattr(
+        cr,
+        "httpx",
+        types.SimpleNamespace(AsyncClient=ThrottlingClient, Limits=lambda **kw: None),
+    )
+    limiter = HostLimiter(2, adaptive=True)
+    broken = asyncio.run(crawl_async("https://site.test", limit=100, timeout=2.0, limiter=limiter))
+    assert ("https://site.test/d", 429) not in broken
+    gate = limiter.gates["site.test"]
+    assert gate.crawl_delay == 0.01
+    assert gate.backoffs == 1
+    assert gate.rate > 0
+
+    limiter = HostLimiter(2, adaptive=False)
+    asyncio.run(crawl_async("https://site.test", limit=100, timeout=2.0, limiter=limiter))
+    assert limiter.gates["site.test"].crawl_delay == 0.01
+
+    limiter = HostLimiter(2, adaptive=False)
+    asyncio.run(crawl_async("https://site.test", limit=100, timeout=2.0, limiter=limiter, robots=False))
+    assert limiter.gates["site.test"].crawl_delay == 0
+
+def test_link_parsers_match_beautifulsoup():
+    from bs4 import BeautifulSoup
+
+    html = (
+        '<html><body><a href="/a">a</a><A HREF="/b?x=1&amp;y=2">b</A>'
+        '<a name="anchor">no href</a><a href>empty</a><div><a href="c.html"/></div>'
+        "<p>unclosed <a href='/d'>d</body></html>"
+    )
+    expected = [a["href"] for a in BeautifulSoup(html, "html.parser").select("a[href]")]
+    assert parse_links(html) == expected
+    assert parse_links(html, "lxml") == expected
+
+def test_link_parsers_only_collect_asset_links():
+    html = (
+        '<link rel="stylesheet" href="/a.css"><link rel="canonical" href="/page">'
+        '<link rel="alternate" hreflang="es" href="/es/"><link rel="Shortcut Icon" href="/favicon.ico">'
+        '<link href="/norel"><link rel="modulepreload" href="/m.js"><img src="/i.png"><img src="">'
+    )
+    for kind in ("html", "lxml"):
+        parser = make_parser(kind)
+        parser.feed(html)
+        parser.close()
+        assert parser.assets == ["/a.css", "/favicon.ico", "/m.js", "/i.png"]
+
+def test_lxml_parser_drops_finished_elements():
+    parser = LxmlLinkParser(text=True)
+    parser.feed("<html><body>")
+    for i in range(500):
+        parser.feed(f"<div><p>word{i} <a href='/p{i}'>page</a> more</p></div>")
+    root = parser._parser.close()
+    assert len(parser.links) == 500
+    assert len(root.find("body")) <= 1
+
+def test_crawl_async_skips_non_html_bodies(monkeypatch):
+    import devx.services.linkscan.crawler as cr
+
+    responses = []
+
+    class MixedClient(AsyncSiteClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__()
+            self.pages = {
+                "https://site.test": '<a href="/doc.pdf">pdf</a> <a href="/img">img</a> <a href="/dl.zip">zip</a>',
+            }
+
+        async def page(self, method, url, headers):
+            if url.endswith("/doc.pdf"):
+                r = AsyncDummyResp("%PDF", 200, {"content-type": "application/pdf"})
+            elif url.endswith("/dl.zip"):
+                status = 405 if method == "HEAD" else 206
+                assert method == "HEAD" or headers.get("Range") == "bytes=0-0"
+                r = AsyncDummyResp("PK", status, {"content-type": "application/zip"})
+            elif url.endswith("/img"):
+                r = AsyncDummyResp('<a href="/never">x</a>', 200, {"content-type": "image/png"})
+            else:
+                r = await super().page(method, url, headers)
+            responses.append((method, url, r))
+            return r
+
+    clients = []
+
+    def factory(*args, **kwargs):
+        clients.append(MixedClient())
+        return clients[-1]
+
+    monkeypatch.setattr(
+        cr, "httpx", types.SimpleNamespace(AsyncClient=factory, Limits=lambda **kw: None)
+    )
+    broken = asyncio.run(crawl_async("https://site.test", limit=10, timeout=2.0))
+    assert broken == []
+    calls = clients[0].calls
+    assert ("HEAD", "https://site.test/doc.pdf") in calls
+    assert ("GET", "https://site.test/doc.pdf") not in calls
+    assert ("GET", "https://site.test/dl.zip") in calls
+    assert all(url != "https://site.test/never" for _, url in calls)
+    by_url = {url: r for _, url, r in responses}
+    assert by_url["https://site.test"].body_read
+    assert not by_url["https://site.test/img"].body_read
+
+def test_canonicalize_and_visited_sets():
+    assert canonicalize("HTTPS://Site.Test:443/a#x") == "https://site.test/a"
+    assert canonicalize("http://site.test") == "http://site.test/"
+    assert canonicalize("http://site.test:8080/b?z=1&a=2") == "http://site.test:8080/b?a=2&z=1"
+    assert canonicalize("http://site.test/%7ea") == "http://site.test/%7Ea"
+
+    for visited in (FingerprintSet(buffer_size=2), BloomFilter(capacity=100, error_rate=0.01)):
+        assert visited.add("https://site.test")
+        assert not visited.add("https://site.test/#top")
+        assert visited.add("https://site.test/a?x=1&y=2")
+        assert visited.add("https://site.test/b")
+        assert not visited.add("https://SITE.test/a?y=2&x=1")
+        assert "https://site.test:443/b" in visited
+        assert "https://site.test/c" not in visited
+        assert len(visited) == 3
+
+    visited = FingerprintSet(buffer_size=7)
+    urls = [f"https://site.test/p{i}" for i in range(100)]
+    assert all(visited.add(u) for u in urls)
+    assert not any(visited.add(u) for u in urls)
+    assert list(visited._sorted) == sorted(visited._sorted)
+    assert len(visited) == 100
+
+def test_crawl_streams_only_html_bodies(monkeypatch):
+    import devx.services.linkscan.crawler as cr
+
+    responses = []
+
+    class MixedClient(DummyClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__()
+            self.pages = {
+                "https://site.test": '<a href="/feed">feed</a> <a href="/doc.pdf">pdf</a> <a href="/big">big</a>',
+                "https://site.test/big": "x" * 200 + '<a href="/deep">deep</a>',
+            }
+
+        def get(self, url):
+            if url == "https://site.test/feed":
+                resp = DummyResp('<a href="/hidden">x</a>', 200, {"content-type": "application/json"})
+            elif url == "https://site.test/doc.pdf":
+                resp = DummyResp("%PDF", 200, {"content-type": "application/pdf"})
+            else:
+                resp = super().get(url)
+            responses.append((url, resp))
+            return resp
+
+    monkeypatch.setattr(cr, "httpx", types.SimpleNamespace(Client=MixedClient))
+    monkeypatch.setattr(cr, "MAX_HTML_CHARS", 100)
+    # /deep sits past the cap, so it is never requested (it would be a 500).
+    assert crawl("https://site.test", limit=10, timeout=2.0) == []
+    read = {url: resp.body_read for url, resp in responses}
+    assert read == {
+        "https://site.test": True,
+        "https://site.test/feed": False,
+        "https://site.test/doc.pdf": False,
+        "https://site.test/big": True,
+    }
+
+def test_crawl_dedups_equivalent_urls(monkeypatch):
+    import devx.services.linkscan.crawler as cr
+
+    class AliasClient(DummyClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__()
+            self.pages["https://site.test"] = (
+                '<a href="/ok">ok</a> <a href="/ok#section">same</a> '
+                '<a href="https://SITE.test:443/ok">same</a> <a href="/">root</a>'
+            )
+            self.requested = []
+
+        def get(self, url):
+            self.requested.append(url)
+            return super().get(url)
+
+    clients = []
+
+    def factory(*args, **kwargs):
+        clients.append(AliasClient())
+        return clients[-1]
+
+    monkeypatch.setattr(cr, "httpx", types.SimpleNamespace(Client=factory))
+    assert crawl("https://site.test", limit=10, timeout=2.0) == []
+    assert clients[0].requested == ["https://site.test", "https://site.test/ok"]
+
+def test_crawl_async_resumes_and_revalidates(monkeypatch, tmp_path):
+    import devx.services.linkscan.crawler as cr
+
+    class Interrupted(BaseException):
+        pass
+
+    class ConditionalClient(AsyncSiteClient):
+        stop_at = None
+
+        async def page(self, method, url, headers):
+            if url == self.stop_at:
+                raise Interrupted()
+            page = self.pages.get(url)
+            if page is None:
+                return AsyncDummyResp("", 500)
+            etag = f'"{len(page)}"'
+            if headers.get("If-None-Match") == etag:
+                return AsyncDummyResp("", 304, {"etag": etag})
+            return AsyncDummyResp(page, 200, {"content-type": "text/html", "etag": etag})
+
+    clients = []
+
+    def factory(*args, **kwargs):
+        clients.append(ConditionalClient())
+        return clients[-1]
+
+    monkeypatch.setattr(
+        cr,
+        "httpx",
+        types.SimpleNamespace(Client=SiteClient, AsyncClient=factory, Limits=lambda **kw: None),
+    )
+    expected = crawl("https://site.test", limit=100, timeout=2.0)
+
+    def run(state):
+        return asyncio.run(crawl_async("https://site.test", limit=100, timeout=2.0, concurrency=1, state=state))
+
+    path = tmp_path / "crawl.db"
+    ConditionalClient.stop_at = "https://site.test/c"
+    with CrawlState(path) as state:
+        try:
+            run(state)
+        except Interrupted:
+            pass
+        else:
+            raise AssertionError("crawl was not interrupted")
+    ConditionalClient.stop_at = None
+
+    with CrawlState(path) as state:
+        assert run(state) == expected
+        assert state.resumed
+    fetched = [url for _, url in clients[-1].calls]
+    assert "https://site.test" not in fetched
+    assert "https://site.test/a" not in fetched
+    assert "https://site.test/c" in fetched
+
+    with CrawlState(path) as state:
+        assert run(state) == expected
+        assert not state.resumed
+        assert state.unchanged == 7
+    assert len([url for _, url in clients[-1].calls if not url.endswith("/robots.txt")]) == 9
+
+def test_crawl_state_upgrades_older_files(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(str(path))
+    conn.executescript(
+        "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);"
+        "CREATE TABLE pages (url TEXT PRIMARY KEY, status, etag TEXT, last_modified TEXT, links TEXT, fetched_at REAL);"
+        "CREATE TABLE frontier (url TEXT PRIMARY KEY, level INTEGER NOT NULL, pos INTEGER NOT NULL, done INTEGER NOT NULL DEFAULT 0);"
+        """INSERT INTO pages VALUES ('https://site.test/', 200, '"1"', NULL, '["/a"]', 0);"""
+    )
+    conn.close()
+
+    with CrawlState(path) as state:
+        page = state.page("https://site.test/")
+        assert page.links == ["/a"] and page.simhash is None
+        assert state.targets("https://site.test/") == ([], [])
+        state.start("https://site.test")
+        state.record("https://site.test/a", Page(200, ["/"], (["https://x.test"], []), '"2"', simhash=7))
+    with CrawlState(path) as state:
+        assert state.page("https://site.test/a").simhash == 7
+        assert state.conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
+SITEMAP_INDEX = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+    b"<sitemap><loc>https://site.test/pages.xml.gz</loc></sitemap></sitemapindex>"
+)
+SITEMAP_PAGES = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+    b"<url><loc>https://site.test/orphan</loc><lastmod>2024-01-01</lastmod></url>"
+    b"<url><loc> https://site.test/f </loc></url>"
+    b"<url><loc>https://other.test/x</loc></url></urlset>"
+)
+
+def test_sitemap_parser_streams_plain_and_gzip():
+    import gzip
+
+    for data in (SITEMAP_PAGES, gzip.compress(SITEMAP_PAGES)):
+        parser = SitemapParser()
+        for i in range(0, len(data), 7):
+            parser.feed(data[i : i + 7])
+        parser.close()
+        assert parser.urls == ["https://site.test/orphan", "https://site.test/f", "https://other.test/x"]
+        assert parser.sitemaps == []
+    parser = SitemapParser()
+    parser.feed(SITEMAP_INDEX)
+    parser.close()
+    assert parser.sitemaps == ["https://site.test/pages.xml.gz"]
+
+    parser = SitemapParser()
+    parser.feed(
+        b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+        b' xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">'
+        b"<url><loc>https://site.test/gallery</loc>"
+        b"<image:image><image:loc>https://cdn.test/photo.jpg</image:loc></image:image></url>"
+        b"<url><image:image><image:loc>https://cdn.test/only.jpg</image:loc></image:image></url>"
+        b"</urlset>"
+    )
+    parser.close()
+    assert parser.urls == ["https://site.test/gallery"]
+
+def test_crawl_async_seeds_from_sitemaps(monkeypatch):
+    import gzip
+    import devx.services.linkscan.crawler as cr
+
+    class BytesResp(AsyncDummyResp):
+        def __init__(self, data):
+            super().__init__("", 200, {"content-type": "application/xml"})
+            self.data = data
+
+        async def aiter_bytes(self):
+            for i in range(0, len(self.data), 64):
+                yield self.data[i : i + 64]
+
+    class SitemapClient(AsyncSiteClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__()
+            self.pages["https://site.test/robots.txt"] = "Sitemap: https://site.test/index.xml"
+            self.pages["https://site.test/orphan"] = '<a href="/orphan-child">child</a>'
+            self.pages["https://site.test/orphan-child"] = "<p>leaf</p>"
+
+        async def page(self, method, url, headers):
+            if url.endswith("/index.xml"):
+                return BytesResp(SITEMAP_INDEX)
+            if url.endswith("/pages.xml.gz"):
+                return BytesResp(gzip.compress(SITEMAP_PAGES))
+            return await super().page(method, url, headers)
+
+    clients = []
+
+    def factory(*args, **kwargs):
+        clients.append(SitemapClient())
+        return clients[-1]
+
+    monkeypatch.setattr(
+        cr, "httpx", types.SimpleNamespace(AsyncClient=factory, Limits=lambda **kw: None)
+    )
+    broken = asyncio.run(crawl_async("https://site.test", limit=100, timeout=2.0, sitemaps=True))
+    assert [url for url, _ in broken] == ["https://site.test/broken", "https://site.test/gone"]
+    fetched = [url for method, url in clients[0].calls if method == "GET"]
+    assert fetched.index("https://site.test/f") < fetched.index("https://site.test/c")
+    assert "https://site.test/orphan-child" in fetched
+    assert fetched.count("https://site.test/f") == 1
+    assert "https://other.test/x" not in fetched
+
+def test_crawl_async_checks_assets_and_external_once(monkeypatch):
+    import devx.services.linkscan.crawler as cr
+
+    cdn = '<img src="https://cdn.test/logo.png"><script src="/app.js"></script>'
+
+    class AssetClient(AsyncSiteClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__()
+            self.pages = {url: page + cdn for url, page in SITE.items()}
+            self.pages["https://site.test/d"] += '<link rel="stylesheet" href="/missing.css">'
+
+        async def page(self, method, url, headers):
+            if url == "https://other.test/x":
+                status = 405 if method == "HEAD" else 206
+                return AsyncDummyResp("", status, {"content-type": "text/html"})
+            if url.startswith("https://cdn.test/") or url.endswith("/app.js"):
+                return AsyncDummyResp("", 200, {"content-type": "image/png"})
+            return await super().page(method, url, headers)
+
+    clients = []
+
+    def factory(*args, **kwargs):
+        clients.append(AssetClient())
+        return clients[-1]
+
+    monkeypatch.setattr(
+        cr, "httpx", types.SimpleNamespace(AsyncClient=factory, Limits=lambda **kw: None)
+    )
+    checker = TargetChecker(assets=True, external=True)
+    broken = asyncio.run(crawl_async("https://site.test", limit=100, timeout=2.0, checker=checker))
+    assert [url for url, _ in broken] == ["https://site.test/broken", "https://site.test/gone"]
+    calls = clients[0].calls
+    assert calls.count(("HEAD", "https://cdn.test/logo.png")) == 1
+    assert calls.count(("HEAD", "https://site.test/app.js")) == 1
+    assert ("GET", "https://other.test/x") in calls
+    assert checker.requests == 4
+    assert checker.referrers["https://cdn.test/logo.png"][0] == "https://site.test"
+    assert len(checker.referrers["https://cdn.test/logo.png"]) == 7
+    assert checker.broken() == [("https://site.test/missing.css", 500, ["https://site.test/d"])]
+
+def test_simhash_near_duplicates():
+    def simhash(text):
+        h = SimHash()
+        h.update(text)
+        return h.digest()
+
+    body = " ".join(f"event{i}" for i in range(300))
+    a, b = simhash(f"Calendar {body} day 1"), simhash(f"Calendar {body} day 2")
+    other = simhash(" ".join(f"article{i}" for i in range(300)))
+    assert hamming(a, b) <= 3 < hamming(a, other)
+    assert url_pattern("https://site.test/cal/2024/05?view=month&page=3") == "site.test/cal/*/*?page&view"
+
+    dups = NearDuplicates(distance=3, prune_after=2)
+    assert dups.observe("https://site.test/cal/1", a)
+    assert dups.observe("https://site.test/cal/2", b)
+    assert dups.observe("https://site.test/news", other)
+    assert not dups.observe("https://site.test/cal/3", a)
+    assert not dups.observe("https://site.test/cal/4", other)
+    assert dups.clusters == {
+        "https://site.test/cal/1": ["https://site.test/cal/1", "https://site.test/cal/2", "https://site.test/cal/3"]
+    }
+    assert dups.pruned == {"site.test/cal/*": 1}
+
+def test_crawl_async_prunes_near_duplicates_and_reports_soft_404(monkeypatch):
+    import devx.services.linkscan.crawler as cr
+
+    body = " ".join(f"event{i}" for i in range(300))
+    not_found = "<h1>Sorry</h1><p>" + " ".join(f"missing{i}" for i in range(60)) + "</p>"
+
+    class CalendarClient(AsyncSiteClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__()
+            self.pages = {
+                "https://site.test": '<a href="/cal/1">calendar</a> <a href="/old-page">old</a>',
+            }
+
+        async def page(self, method, url, headers):
+            if "/cal/" in url:
+                n = int(url.rsplit("/", 1)[1])
+                html = f'<script>var day = {n};</script><p>Calendar {body} day {n}</p><a href="/cal/{n + 1}">next</a>'
+                return AsyncDummyResp(html, 200)
+            return AsyncDummyResp(self.pages.get(url, not_found), 200)
+
+    clients = []
+
+    def factory(*args, **kwargs):
+        clients.append(CalendarClient())
+        return clients[-1]
+
+    monkeypatch.setattr(
+        cr, "httpx", types.SimpleNamespace(AsyncClient=factory, Limits=lambda **kw: None)
+    )
+    dedup = NearDuplicates(distance=3, prune_after=2)
+    broken = asyncio.run(crawl_async("https://site.test", limit=100, timeout=2.0, dedup=dedup))
+    assert broken == [("https://site.test/old-page", "soft-404")]
+    fetched = [url for _, url in clients[0].calls]
+    assert "https://site.test/cal/3" in fetched
+    assert "https://site.test/cal/4" not in fetched
+    assert dedup.clusters["https://site.test/cal/1"][1:] == ["https://site.test/cal/2", "https://site.test/cal/3"]
+
+def test_cli_rejects_unknown_parser_and_visited_set():
+    from typer.testing import CliRunner
+    from devx.services.linkscan.cli import app
+
+    result = CliRunner().invoke(app, ["https://site.test", "--parser", "xml"])
+    assert result.exit_code == 2
+    with pytest.raises(ValueError):
+        parse_links("<a href='/a'>a</a>", "xml")
+
+    result = CliRunner().invoke(app, ["https://site.test", "--visited", "blom"])
+    assert result.exit_code == 2
+    with pytest.raises(ValueError):
+        make_visited("blom")
@@ -1,6 +1,14 @@
 import asyncio
+import gzip
+import random
+import threading
+import time
 import types
-from devx.services.loadtest.engine import run_load
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from devx.services.loadtest.compare import compare, load_baseline, mann_whitney, save_baseline
+from devx.services.loadtest.engine import LoadResult, PhaseTrace, run_load, run_load_detailed, to_json
+from devx.services.loadtest.replay import SAFE_METHODS, iter_log, plan_from_log, run_replay
+from devx.services.loadtest.streams import run_sse, run_websocket
 
 class DummyResponse:
     def __init__(self, status_code=200):
@@ -16,7 +24,7 @@ class DummyAsyncClient:
     async def __aexit__(self, exc_type, exc, tb):
         return False
 
-    async def request(self, method, url, headers=None, json=None, content=None):
+    async def request(self, method, url, headers=None, json=None, content=None, extensions=None):
         if "fail" in url:
             return DummyResponse(500)
         return DummyResponse(200)
@@ -66,3 +74,342 @@ def test_run_load_with_errors(monkeypatch):
     assert len(codes) == 3
     assert all(c == 500 for c in codes)
     assert errors == 0
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_phase_trace_splits_connect_and_dns():
+    trace = PhaseTrace()
+    trace.dns = 0.01
+    trace.marks = {
+        "connect_tcp.started": 1.0,
+        "connect_tcp.complete": 1.03,
+        "send_request_headers.started": 1.04,
+        "receive_response_headers.complete": 1.10,
+        "receive_response_body.started": 1.10,
+        "receive_response_body.complete": 1.15,
+    }
+    phases = trace.phases()
+    assert trace.new_connection
+    assert abs(phases["dns"] - 0.01) < 1e-9
+    assert abs(phases["connect"] - 0.02) < 1e-9
+    assert abs(phases["ttfb"] - 0.06) < 1e-9
+    assert abs(phases["body"] - 0.05) < 1e-9
+    assert "tls" not in phases
+
+def test_run_load_records_phases_against_local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        res = asyncio.run(
+            run_load_detailed(
+                url=f"http://127.0.0.1:{server.server_port}/",
+                rps=4,
+                duration=2,
+                method="GET",
+                timeout=5.0,
+                headers={},
+                body=None,
+                verify_ssl=True,
+            )
+        )
+    finally:
+        server.shutdown()
+    assert res.codes == [200] * 8
+    assert res.new_connections >= 1
+    assert res.new_connections + res.reused_connections == 8
+    assert res.reused_connections >= 4
+    assert res.phases["connect"].count == res.new_connections
+    assert res.phases["dns"].count == res.new_connections
+    assert res.phases["ttfb"].count == 8
+    assert res.phases["tls"].count == 0
+
+def test_resolving_backend_tries_each_address(monkeypatch):
+    import httpcore
+    import devx.services.loadtest.engine as eng
+
+    class Inner:
+        def __init__(self):
+            self.tried = []
+
+        async def connect_tcp(self, host, port, **kwargs):
+            self.tried.append(host)
+            if host == "10.0.0.1":
+                raise httpcore.ConnectError("refused")
+            return "stream"
+
+    async def fake_getaddrinfo(self, host, port, **kwargs):
+        return [(0, 0, 0, "", (ip, port)) for ip in ("10.0.0.1", "10.0.0.1", "10.0.0.2")]
+
+    monkeypatch.setattr(asyncio.BaseEventLoop, "getaddrinfo", fake_getaddrinfo)
+    inner = Inner()
+    stream = asyncio.run(eng._ResolvingBackend(inner).connect_tcp("example.test", 80))
+    assert stream == "stream"
+    assert inner.tried == ["10.0.0.1", "10.0.0.2"]
+
+def test_tracing_transport_maps_errors_and_honours_proxies(monkeypatch):
+    import httpcore
+    import httpx
+    import devx.services.loadtest.engine as eng
+
+    request = httpx.Request("GET", "http://site.test/")
+    for raw, mapped in (
+        (httpcore.PoolTimeout("p"), httpx.PoolTimeout),
+        (httpcore.ReadTimeout("r"), httpx.ReadTimeout),
+        (httpcore.WriteError("w"), httpx.WriteError),
+        (httpcore.ProxyError("x"), httpx.ProxyError),
+        (httpcore.RemoteProtocolError("e"), httpx.RemoteProtocolError),
+    ):
+        error = eng._map_error(raw, request)
+        assert type(error) is mapped and error.request is request
+    other = ValueError("not httpcore")
+    assert eng._map_error(other) is other
+
+    monkeypatch.setenv("HTTP_PROXY", "http://proxy.test:3128")
+    monkeypatch.setenv("NO_PROXY", "internal.test")
+    transport = eng._TracingTransport(True)
+    assert isinstance(transport._pool_for(httpx.URL("http://site.test/")), httpcore.AsyncHTTPProxy)
+    assert transport._pool_for(httpx.URL("http://internal.test/")) is transport._pool
+    plain = eng._TracingTransport(True, trust_env=False)
+    assert plain._pool_for(httpx.URL("http://site.test/")) is plain._pool
+
+class BlockingAsyncClient(DummyAsyncClient):
+    async def request(self, method, url, headers=None, json=None, content=None, extensions=None):
+        time.sleep(0.05)  # CPU-bound client: blocks the event loop
+        return DummyResponse(200)
+
+def test_calibration_flags_client_bound_run(monkeypatch):
+    import devx.services.loadtest.engine as eng
+
+    monkeypatch.setattr(
+        eng, "httpx", types.SimpleNamespace(AsyncClient=BlockingAsyncClient)
+    )
+    res = asyncio.run(
+        run_load_detailed("https://service.ok", 50, 1, "GET", 5.0, {}, None, True)
+    )
+    cal = res.calibration
+    assert cal.dispatched == 50
+    assert cal.achieved_rps < 50 * 0.95
+    assert cal.drift.percentile(99) > 0.05
+    assert not cal.valid
+    assert "--workers" in cal.warnings()[0]
+    assert to_json(res)["valid"] is False
+
+def test_loop_monitor_measures_cpu_over_send_window_only():
+    from devx.services.loadtest.calibration import Calibration, LoopMonitor
+
+    async def scenario():
+        cal = Calibration()
+        monitor = LoopMonitor(cal)
+        monitor.start()
+        end = time.perf_counter() + 0.15
+        while time.perf_counter() < end:
+            pass
+        monitor.mark_sent()
+        await asyncio.sleep(0.45)  # drain: waiting for responses, no CPU
+        await monitor.stop()
+        return cal
+
+    cal = asyncio.run(scenario())
+    assert cal.wall_seconds >= 0.6
+    assert cal.cpu_percent > 40  # over the whole run it would be at most 25%
+
+def test_calibration_accepts_healthy_run(monkeypatch):
+    import devx.services.loadtest.engine as eng
+
+    monkeypatch.setattr(
+        eng, "httpx", types.SimpleNamespace(AsyncClient=DummyAsyncClient)
+    )
+    res = asyncio.run(
+        run_load_detailed("https://service.ok", 20, 1, "GET", 5.0, {}, None, True)
+    )
+    assert res.calibration.dispatched == 20
+    assert res.calibration.valid
+    assert to_json(res)["calibration"]["warnings"] == []
+
+def _result(latencies, wall=1.0):
+    res = LoadResult(latencies=list(latencies), codes=[200] * len(latencies))
+    res.calibration.wall_seconds = wall
+    return res
+
+def test_mann_whitney_detects_shift_only_when_present():
+    rng = random.Random(1)
+    a = [rng.gauss(0.100, 0.01) for _ in range(300)]
+    same = [rng.gauss(0.100, 0.01) for _ in range(300)]
+    slower = [rng.gauss(0.110, 0.01) for _ in range(300)]
+    assert mann_whitney(a, same)[1] > 0.01
+    assert mann_whitney(a, slower)[1] < 1e-6
+
+def test_compare_flags_latency_regression(tmp_path):
+    rng = random.Random(2)
+    base = _result([rng.gauss(0.100, 0.01) for _ in range(400)])
+    path = tmp_path / "baseline.json"
+    save_baseline(path, base, {"url": "https://service.ok"})
+    baseline = load_baseline(path)
+
+    same = compare(baseline, _result([rng.gauss(0.100, 0.01) for _ in range(400)]), iterations=200)
+    assert not any(m.regression for m in same)
+
+    slow = compare(baseline, _result([rng.gauss(0.150, 0.01) for _ in range(400)]), iterations=200)
+    by_name = {m.name: m for m in slow}
+    assert by_name["P50 (s)"].regression and by_name["P50 (s)"].ci[0] > 0
+    assert by_name["P99 (s)"].regression
+    assert not by_name["Throughput (rps)"].regression
+
+def test_compare_flags_throughput_drop(tmp_path):
+    path = tmp_path / "baseline.json"
+    save_baseline(path, _result([0.1] * 100, wall=1.0))
+    changes = compare(load_baseline(path), _result([0.1] * 100, wall=2.0), iterations=50)
+    tp = changes[0]
+    assert tp.regression and abs(tp.change + 0.5) < 1e-9
+    assert tp.test == "threshold ±10%" and tp.p_value is None
+
+def test_meta_mismatches_flags_different_runs(tmp_path):
+    from devx.services.loadtest.compare import meta_mismatches
+
+    path = tmp_path / "baseline.json"
+    save_baseline(path, _result([0.1] * 10), {"url": "https://a.example", "method": "GET", "rps": 10, "duration": 5})
+    baseline = load_baseline(path)
+    assert meta_mismatches(baseline, {"url": "https://a.example", "method": "GET", "rps": 10, "duration": 30}) == []
+    assert meta_mismatches(baseline, {"url": "https://b.example", "method": "GET", "rps": 50}) == [
+        "url: baseline 'https://a.example', current 'https://b.example'",
+        "rps: baseline 10, current 50",
+    ]
+
+ACCESS_LOG = (
+    '10.0.0.1 - - [10/Oct/2026:13:55:30 +0000] "GET /api/items?id=1 HTTP/1.1" 200 12 "-" "curl/8"\n'
+    '10.0.0.2 - - [10/Oct/2026:13:55:31 +0000] "POST /api/items HTTP/1.1" 201 12 "-" "curl/8"\n'
+    "not a log line\n"
+    '10.0.0.3 - - [10/Oct/2026:13:55:32 +0000] "GET / HTTP/1.1" 200 512 "-" "Mozilla/5.0"\n'
+)
+
+def test_iter_log_streams_plain_and_gzip(tmp_path):
+    plain = tmp_path / "access.log"
+    plain.write_text(ACCESS_LOG, encoding="utf-8")
+    packed = tmp_path / "access.log.1"
+    with gzip.open(packed, "wt", encoding="utf-8") as f:
+        f.write(ACCESS_LOG)
+
+    for path in (plain, packed):
+        entries = list(iter_log(path, methods=SAFE_METHODS))
+        assert [e.target for e in entries] == ["/api/items?id=1", "/"]
+        assert entries[1].ts - entries[0].ts == 2
+    assert len(list(iter_log(plain))) == 3
+
+def test_plan_from_log_speed_and_fixed_rate(tmp_path):
+    plain = tmp_path / "access.log"
+    plain.write_text(ACCESS_LOG, encoding="utf-8")
+    offsets = [o for o, _ in plan_from_log(iter_log(plain), speed=2.0)]
+    assert offsets == [0.0, 0.5, 1.0]
+    offsets = [o for o, _ in plan_from_log(iter_log(plain), rps=10, limit=2)]
+    assert offsets == [0.0, 0.1]
+
+def test_run_replay_reports_per_path(monkeypatch, tmp_path):
+    import devx.services.loadtest.engine as eng
+
+    seen = []
+
+    class RecordingClient(DummyAsyncClient):
+        async def request(self, method, url, **kwargs):
+            seen.append((method, url))
+            return DummyResponse(200)
+
+    monkeypatch.setattr(eng, "httpx", types.SimpleNamespace(AsyncClient=RecordingClient))
+    plain = tmp_path / "access.log"
+    plain.write_text(ACCESS_LOG, encoding="utf-8")
+    plan = plan_from_log(iter_log(plain, methods=SAFE_METHODS), rps=50)
+    res = asyncio.run(run_replay("http://staging.test/base", plan, 5.0, {}, True, rps=50))
+
+    assert seen == [
+        ("GET", "http://staging.test/base/api/items?id=1"),
+        ("GET", "http://staging.test/base/"),
+    ]
+    assert set(res.paths) == {"/api/items", "/"}
+    assert res.calibration.dispatched == 2
+    assert to_json(res)["paths"]["/api/items"]["count"] == 1
+
+def test_origin_form_keeps_targets_verbatim():
+    from devx.services.loadtest.replay import origin_form, path_key
+
+    assert origin_form("/v1/items:batchGet?x=1") == "/v1/items:batchGet?x=1"
+    assert origin_form("//foo/bar") == "//foo/bar"
+    assert origin_form("http://proxy.test/a?b=1") == "/a?b=1"
+    assert origin_form("*") is None
+    assert path_key("/v1/items:batchGet?x=1") == "/v1/items:batchGet"
+    assert path_key("//foo/bar") == "//foo/bar"
+
+async def _echo_ws(request):
+    from aiohttp import web
+
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    async for msg in ws:
+        await ws.send_str(msg.data)
+    return ws
+
+async def _sse_handler(reader, writer):
+    await reader.readuntil(b"\r\n\r\n")
+    writer.write(
+        b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+        b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+    )
+    try:
+        for i in range(100):
+            writer.write(f"id: {i}\ndata: tick {i}\n\n".encode())
+            await writer.drain()
+            await asyncio.sleep(0.05)
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+def test_websocket_mode_measures_round_trips():
+    from aiohttp import web
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/ws", _echo_ws)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            return await run_websocket(
+                f"ws://127.0.0.1:{port}/ws", 3, 1, 10, "ping", 5.0, {}, True
+            )
+        finally:
+            await runner.cleanup()
+
+    res = asyncio.run(scenario())
+    assert res.opened == 3 and res.failed == 0 and res.dropped == 0
+    assert res.connect.count == 3
+    assert res.sent == 30
+    assert res.received == 30
+    assert res.rtt.count == 30
+    assert res.messages_per_second > 0
+
+def test_sse_mode_counts_events():
+    async def scenario():
+        server = await asyncio.start_server(_sse_handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await run_sse(f"http://127.0.0.1:{port}/events", 4, 1, 5.0, {}, True)
+        finally:
+            server.close()
+
+    res = asyncio.run(scenario())
+    assert res.opened == 4 and res.failed == 0
+    assert res.first_event.count == 4
+    assert res.received >= 4 * 10
+    assert res.dropped == 0
@@ -20,3 +20,293 @@ def test_no_false_positive_on_normal_text():
     sample = "This is a normal file without tokens or secrets."
     assert not _match_any(PATTERNS["JWT"], sample)
     assert not _match_any(PATTERNS["Password in code"], sample)
+
+def test_required_literals_from_rules():
+    from devx.services.secrets.engine import required_literals
+
+    assert required_literals(PATTERNS["AWS Access Key"]) == {"akia"}
+    assert required_literals(PATTERNS["JWT"]) == {"eyj"}
+    assert required_literals(PATTERNS["Password in code"]) == {"password", "passwd", "pwd"}
+    assert required_literals(PATTERNS["Generic API Key"]) == {"api", "token", "secret"}
+    assert required_literals(r"[0-9a-f]{32}") is None
+
+def test_engine_matches_one_pass_per_pattern():
+    from devx.services.secrets.engine import Engine, naive_scan, synthetic_corpus
+
+    text = synthetic_corpus(0.2, secret_every=50) + (
+        "\nİstanbul PASSWORD = 'Upper-Case-Secret'\n"
+        "aws_secret_access_key = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJ0123+/'\n"
+        "config['Token'] = \"abcdefghijklmnop1234\"\n"
+    )
+    findings = Engine().scan(text.encode("utf-8"))
+    assert sorted((f.rule, f.match) for f in findings) == sorted(naive_scan(text))
+    last = findings[-1]
+    assert text.splitlines()[last.line - 1].find(last.match) >= 0
+
+def test_scan_file_chunks_match_whole_scan(tmp_path):
+    import io
+    from devx.services.secrets.engine import Engine, synthetic_corpus
+    from devx.services.secrets.scanner import scan_file, scan_stream
+
+    engine = Engine()
+    data = synthetic_corpus(0.05, secret_every=7).encode("utf-8")
+    target = tmp_path / "big.log"
+    target.write_bytes(data)
+    whole = engine.scan(data)
+    assert whole
+    for chunk in (997, 4096):
+        chunked = scan_file(engine, target, chunk=chunk, overlap=128)
+        assert chunked == whole
+        assert scan_stream(engine, io.BytesIO(data), len(data), chunk=chunk, overlap=128) == whole
+    assert scan_stream(engine, io.BytesIO(b"\0" + data), len(data) + 1) is None
+    assert scan_file(engine, target, max_size=len(data) - 1) is None
+
+    binary = tmp_path / "dump.db"
+    binary.write_bytes(b"SQLite format 3\0" + data)
+    assert scan_file(engine, binary) is None
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    assert scan_file(engine, empty) == []
+
+def test_scan_history_dedups_blobs_and_maps_first_commit(tmp_path, tmp_path_factory):
+    import subprocess
+    import pytest
+    from devx.services.secrets.engine import Engine
+    from devx.services.secrets.gitscan import GitError, ScanStats, iter_introduced_blobs, scan_history
+
+    def git(*args):
+        return subprocess.run(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+            cwd=tmp_path, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+
+    git("init", "-q")
+    git("config", "log.showRoot", "false")
+    (tmp_path / "root.py").write_text("password = 'RootCommit123'\n")
+    git("add", ".")
+    git("commit", "-qm", "root")
+    root = git("rev-parse", "HEAD")
+    (tmp_path / "a.py").write_text("x = 1\npassword = 'SuperSecret123'\n")
+    git("add", ".")
+    git("commit", "-qm", "add")
+    first = git("rev-parse", "HEAD")
+    (tmp_path / "copy.py").write_text((tmp_path / "a.py").read_text())
+    (tmp_path / "dump.bin").write_bytes(b"\0password = 'SuperSecret123'")
+    git("add", ".")
+    git("commit", "-qm", "copy")
+    (tmp_path / "a.py").write_text("x = 1\n")
+    (tmp_path / "copy.py").unlink()
+    git("add", "-A")
+    git("commit", "-qm", "remove")
+
+    stats = ScanStats()
+    findings = scan_history(tmp_path, Engine(), stats=stats)
+    assert [(h.finding.rule, h.commit, h.path, h.finding.line) for h in findings] == [
+        ("Password in code", root, "root.py", 1),
+        ("Password in code", first, "a.py", 2),
+    ]
+    assert stats.items == 3
+
+    introduced = iter_introduced_blobs(tmp_path)
+    next(introduced)
+    introduced.close()
+    with pytest.raises(GitError):
+        list(iter_introduced_blobs(tmp_path_factory.mktemp("not-a-repo")))
+
+def test_scan_staged_reports_added_lines_only(tmp_path):
+    import subprocess
+    from devx.services.secrets.engine import Engine
+    from devx.services.secrets.gitscan import ScanStats, scan_staged
+
+    def git(*args):
+        subprocess.run(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+            cwd=tmp_path, check=True, capture_output=True,
+        )
+
+    git("init", "-q")
+    (tmp_path / "app.py").write_text("a = 1\npassword = 'OldSecret123'\nb = 2\n")
+    git("add", ".")
+    git("commit", "-qm", "init")
+    (tmp_path / "app.py").write_text(
+        "a = 1\npassword = 'OldSecret123'\nb = 2\nc = 3\n++ token = 'abcdefghijklmnop1234'\n"
+    )
+    new = "x = 1\n\napi_key = 'A1234567890B1234567'\n# café\n".encode("utf-8")
+    (tmp_path / "new.py").write_bytes(new)
+    spaced = b"password = 'SpacedOut123'\n"
+    (tmp_path / "my settings.py").write_bytes(spaced)
+    (tmp_path / "unstaged.py").write_text("password = 'NotStaged123'\n")
+    git("add", "app.py", "new.py", "my settings.py")
+
+    stats = ScanStats()
+    found = [(path, f.rule, f.line) for path, f in scan_staged(tmp_path, Engine(), stats)]
+    assert found == [
+        ("app.py", "Generic API Key", 5),
+        ("my settings.py", "Password in code", 1),
+        ("new.py", "Generic API Key", 3),
+    ]
+    assert stats.items == 3
+    assert stats.scanned == len(b"c = 3\n++ token = 'abcdefghijklmnop1234'\n") + len(new) + len(spaced)
+
+def test_scan_staged_ignores_diff_prefix_config(tmp_path):
+    import subprocess
+    from devx.services.secrets.engine import Engine
+    from devx.services.secrets.gitscan import scan_staged
+
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    git("config", "diff.mnemonicPrefix", "true")
+    git("config", "diff.noprefix", "true")
+    (tmp_path / "app.py").write_text("password = 'StagedSecret123'\n")
+    git("add", "app.py")
+
+    found = [(path, f.rule, f.line) for path, f in scan_staged(tmp_path, Engine())]
+    assert found == [("app.py", "Password in code", 1)]
+
+def test_entropy_detector_flags_random_literals():
+    import math
+    from devx.services.secrets.engine import Engine
+    from devx.services.secrets.entropy import EntropyDetector, shannon_entropy
+
+    assert shannon_entropy([b"aaaa", b"abcd"]) == [0.0, 2.0]
+    assert math.isclose(shannon_entropy([bytes(range(48, 112))])[0], 6.0)
+
+    data = (
+        b"name = 'this_is_a_very_readable_identifier'\n"
+        b"session = 'q8Zr3LxP0vT9mWc2Nb7YkJ4hGd'\n"
+        b"digest = \"9f86d081884c7d659a2feaa0c55ad015\"\n"
+        b"password = 'Zq8r3LxP0vT9mWc2Nb7YkJ4hGd'\n"
+    )
+    findings = Engine(entropy=EntropyDetector()).scan(data)
+    assert [(f.rule, f.line) for f in findings] == [
+        ("High entropy string", 2),
+        ("High entropy string", 3),
+        ("Password in code", 4),
+    ]
+    assert findings[0].match == "q8Zr3LxP0vT9mWc2Nb7YkJ4hGd"
+    assert Engine(entropy=EntropyDetector(hex_threshold=3.9)).scan(data)[1].line == 4
+
+    # 20 distinct characters: log2(20) = 4.32 bits/char, below the 4.5 default.
+    short = EntropyDetector()
+    assert short.find(b"key = 'q8Zr3LxP0vT9mWc2Nb7Y'", 100) == [(7, b"q8Zr3LxP0vT9mWc2Nb7Y")]
+    assert short.find(b"cls = 'MyApplicationSettings'", 100) == []
+    assert short.threshold(b"q" * 20) < short.threshold(b"q" * 64) == 4.5
+
+def test_entropy_numpy_matches_python():
+    import pytest
+    pytest.importorskip("numpy")
+    from devx.services.secrets import entropy
+
+    tokens = [b"q8Zr3LxP0vT9mWc2Nb7YkJ4hGd", b"aaaaaaaaaaaaaaaaaaaa", b"9f86d081884c7d659a2feaa0c55ad015"]
+    expected = [entropy._entropy(t) for t in tokens]
+    assert all(abs(a - b) < 1e-9 for a, b in zip(entropy._entropy_numpy(tokens), expected))
+
+
+def test_baseline_fingerprints_and_allowlist(tmp_path):
+    from devx.services.secrets.baseline import Allowlist, fingerprint, load_baseline, write_baseline
+
+    fp = fingerprint("Password in code", "src/app.py", "password = 'SuperSecret123'")
+    assert fp == fingerprint("Password in code", "src/app.py", "password  =\t'SuperSecret123' ")
+    assert fp != fingerprint("Password in code", "src/other.py", "password = 'SuperSecret123'")
+
+    allow = Allowlist(paths=["tests/*", "*.md"], rules=["JWT Token"])
+    assert allow.allows("Password in code", "tests/unit/test_x.py")
+    assert allow.allows("Password in code", "README.md")
+    assert allow.allows("JWT Token", "src/app.py")
+    assert not allow.allows("Password in code", "src/app.py")
+    assert not Allowlist()
+
+    path = tmp_path / "baseline.json"
+    findings = [
+        ("Password in code", "src/app.py", 3, "password = 'SuperSecret123'"),
+        ("Password in code", "src/app.py", 9, "password = 'SuperSecret123'"),
+    ]
+    assert write_baseline(path, findings, Allowlist(rules=["JWT Token"])) == 1
+    baseline = load_baseline(path)
+    assert baseline.suppresses("Password in code", "src/app.py", "password = 'SuperSecret123'")
+    assert baseline.suppresses("JWT Token", "src/new.py", "eyJ...")
+    assert not baseline.suppresses("Password in code", "src/app.py", "password = 'Rotated456!'")
+
+    from typer.testing import CliRunner
+    from devx.services.secrets.cli import app
+
+    result = CliRunner().invoke(app, ["run", str(tmp_path), "--staged", "--update-baseline", "--baseline", str(path)])
+    assert result.exit_code == 2
+    assert load_baseline(path).fingerprints == baseline.fingerprints
+
+
+def test_scan_archive_streams_members_with_limits(tmp_path):
+    import io
+    import tarfile
+    import zipfile
+    from devx.services.secrets.archives import is_archive, scan_archive
+    from devx.services.secrets.engine import Engine
+
+    secret = b"x = 1\npassword = 'SuperSecret123'\n"
+    wheel = tmp_path / "pkg-1.0-py3-none-any.whl"
+    with zipfile.ZipFile(wheel, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("pkg/conf.py", secret)
+        zf.writestr("pkg/logo.png", b"password = 'IgnoredByName1'")
+        zf.writestr("pkg/blob.bin", b"\0" * 10)
+        zf.writestr("pkg/big.txt", b"a" * 2048)
+    result = scan_archive(Engine(), wheel, member_bytes=1024, skip=lambda name: name.endswith(".png"))
+    assert [(name, f.line) for name, f in result.findings] == [("pkg/conf.py", 2)]
+    assert (result.members, result.skipped, result.truncated) == (1, 3, False)
+
+    tgz = tmp_path / "bundle.tar.gz"
+    with tarfile.open(tgz, "w:gz") as tf:
+        for name in ("a/conf.py", "b/conf.py"):
+            info = tarfile.TarInfo(name)
+            info.size = len(secret)
+            tf.addfile(info, io.BytesIO(secret))
+    assert is_archive(tgz) and is_archive(wheel) and not is_archive(tmp_path / "x.gz")
+    assert [name for name, _ in scan_archive(Engine(), tgz).findings] == ["a/conf.py", "b/conf.py"]
+    truncated = scan_archive(Engine(), tgz, total_bytes=len(secret) + 1)
+    assert [name for name, _ in truncated.findings] == ["a/conf.py"] and truncated.truncated
+
+    import json
+    from typer.testing import CliRunner
+    from devx.services.secrets.cli import app
+
+    def scanned_paths(*args):
+        out = tmp_path / "out.ndjson"
+        result = CliRunner().invoke(app, ["run", str(tmp_path), "--archives", "--format", "ndjson", "-o", str(out), *args])
+        assert result.exit_code == 0, result.output
+        paths = {json.loads(line)["path"] for line in out.read_text().splitlines()}
+        out.unlink()
+        return sorted(paths)
+
+    assert scanned_paths() == ["bundle.tar.gz!a/conf.py", "bundle.tar.gz!b/conf.py", f"{wheel.name}!pkg/conf.py"]
+    assert scanned_paths("--ignore", r"\.whl$") == ["bundle.tar.gz!a/conf.py", "bundle.tar.gz!b/conf.py"]
+
+
+def test_finding_writers_stream_valid_documents(tmp_path):
+    import io
+    import json
+    import pytest
+    from devx.core.findings import FindingWriter, open_writer
+
+    out = tmp_path / "findings.sarif"
+    with pytest.raises(KeyboardInterrupt):
+        with open_writer("sarif", out, "devx-secrets", ["JWT"]) as writer:
+            writer.write("JWT", "a.py", 3, "Potential secret: JWT", {"fingerprint": "abc"})
+            writer.write("JWT", "b.zip!c.py", 1, "Potential secret: JWT")
+            raise KeyboardInterrupt
+    run = json.loads(out.read_text())["runs"][0]
+    assert run["tool"]["driver"]["rules"] == [{"id": "JWT", "name": "JWT"}]
+    assert [r["locations"][0]["physicalLocation"]["artifactLocation"]["uri"] for r in run["results"]] == ["a.py", "b.zip!c.py"]
+    assert run["results"][0]["properties"] == {"fingerprint": "abc"}
+
+    with open_writer("sarif", tmp_path / "empty.sarif", "devx-secrets"):
+        pass
+    assert json.loads((tmp_path / "empty.sarif").read_text())["runs"][0]["results"] == []
+
+    with open_writer("ndjson", tmp_path / "findings.ndjson", "devx-secrets") as writer:
+        writer.write("JWT", "a.py", 3, "Potential secret: JWT")
+    records = [json.loads(l) for l in (tmp_path / "findings.ndjson").read_text().splitlines()]
+    assert records == [{"rule": "JWT", "path": "a.py", "line": 3, "message": "Potential secret: JWT"}]
+
+    with pytest.raises(TypeError):
+        FindingWriter(io.StringIO())